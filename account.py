@@ -1,43 +1,282 @@
 
+import json
+import uuid
+
 from game import Game
 from ui import ModernStyledButton
 
 from PyQt5.QtWidgets import *
 
+class GameList(list):
+    """An account's games; adding, removing or reordering marks the account dirty
+    and is reported to the account's registry with the affected range"""
+    __slots__ = ("_account",)
+
+    def __init__(self, account, games=()):
+        super().__init__(games)
+        self._account = account
+        self._adopt(self)
+
+    def _adopt(self, games):
+        registry = self._account._registry
+        for game in games:
+            game._owner = self._account
+            if registry is not None:
+                registry._game_added(game)
+
+    def _release(self, games):
+        registry = self._account._registry
+        for game in games:
+            if game._owner is self._account:
+                game._owner = None
+                if registry is not None:
+                    registry._game_removed(game)
+
+    def _inserted(self, first, count):
+        registry = self._account._registry
+        if registry is not None and count:
+            registry._games_inserted(self._account, first, first + count - 1)
+
+    def _removed(self, first, games):
+        registry = self._account._registry
+        if registry is not None and games:
+            registry._games_removed(self._account, first, first + len(games) - 1, games)
+
+    def _reset(self):
+        registry = self._account._registry
+        if registry is not None:
+            registry._games_reset(self._account)
+
+    def append(self, game):
+        super().append(game)
+        self._adopt([game])
+        self._account.mark_dirty()
+        self._inserted(len(self) - 1, 1)
+
+    def insert(self, index, game):
+        position = min(max(index + len(self), 0) if index < 0 else index, len(self))
+        super().insert(position, game)
+        self._adopt([game])
+        self._account.mark_dirty()
+        self._inserted(position, 1)
+
+    def extend(self, games):
+        games = list(games)
+        first = len(self)
+        super().extend(games)
+        self._adopt(games)
+        self._account.mark_dirty()
+        self._inserted(first, len(games))
+
+    def __iadd__(self, games):
+        self.extend(games)
+        return self
+
+    def remove(self, game):
+        position = self.index(game)
+        super().__delitem__(position)
+        self._release([game])
+        self._account.mark_dirty()
+        self._removed(position, [game])
+
+    def pop(self, index=-1):
+        position = range(len(self))[index]
+        game = super().pop(position)
+        self._release([game])
+        self._account.mark_dirty()
+        self._removed(position, [game])
+        return game
+
+    def clear(self):
+        games = list(self)
+        super().clear()
+        self._release(games)
+        self._account.mark_dirty()
+        self._removed(0, games)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            old = self[index]
+            new = list(value)
+            super().__setitem__(index, new)
+            self._release(old)
+            self._adopt(new)
+            self._account.mark_dirty()
+            self._reset()
+            return
+
+        position = range(len(self))[index]
+        old = self[position]
+        super().__setitem__(position, value)
+        self._release([old])
+        self._adopt([value])
+        self._account.mark_dirty()
+        self._removed(position, [old])
+        self._inserted(position, 1)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, _, step = index.indices(len(self))
+            old = self[index]
+            super().__delitem__(index)
+            self._release(old)
+            self._account.mark_dirty()
+            if step == 1:
+                self._removed(start, old)
+            else:
+                self._reset()
+            return
+
+        position = range(len(self))[index]
+        old = self[position]
+        super().__delitem__(position)
+        self._release([old])
+        self._account.mark_dirty()
+        self._removed(position, [old])
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._account.mark_dirty()
+        self._reset()
+
+    def reverse(self):
+        super().reverse()
+        self._account.mark_dirty()
+        self._reset()
+
+
 class SteamAccount:
-    def __init__(self, name, username, password="", password_hint="", auto_login=False):
+    __slots__ = (
+        "id", "name", "username", "password_hint", "auto_login", "games", "_registry",
+        "_revision", "_json_cache", "_ciphertext", "_plaintext", "_encryption_handler"
+    )
+    _TRACKED_FIELDS = ("name", "username", "password_hint", "auto_login")
+
+    def __init__(self, name, username, password="", password_hint="", auto_login=False, id=None):
+        self.id = id or uuid.uuid4().hex
+        self._registry = None
+        self._revision = 0
+        self._json_cache = None
+        self._ciphertext = ""
+        self._plaintext = None
+        self._encryption_handler = None
         self.name = name
         self.username = username
         self.password = password
         self.password_hint = password_hint
         self.auto_login = auto_login
         self.games = []
-        
+
+    def __setattr__(self, name, value):
+        if name == "games":
+            previous = getattr(self, "games", None)
+            if previous is not None:
+                previous._release(previous)
+            value = GameList(self, value)
+        super().__setattr__(name, value)
+        if name == "games" or name in SteamAccount._TRACKED_FIELDS:
+            self.mark_dirty()
+            registry = self._registry
+            if registry is not None:
+                if name == "games":
+                    registry._games_reset(self)
+                else:
+                    registry._account_changed(self)
+
+    def mark_dirty(self):
+        """Invalidate the cached serialized form of this account"""
+        self._revision += 1
+
+    @property
+    def password(self):
+        """The plaintext password, decrypted only when first needed"""
+        plaintext = self._plaintext
+        if plaintext is not None:
+            return plaintext
+        if not self._ciphertext:
+            return ""
+        return self._encryption_handler.decrypt_cached(self._ciphertext)
+
+    @password.setter
+    def password(self, value):
+        value = value or ""
+        if self._plaintext is None and value == self.password:
+            return
+        # Kept in plaintext only until the next save encrypts it
+        self._plaintext = value
+        self.mark_dirty()
+
+    @property
+    def has_password(self):
+        """True if a password is stored, without decrypting it"""
+        plaintext = self._plaintext
+        return bool(plaintext) if plaintext is not None else bool(self._ciphertext)
+
+    def _encrypted_password(self, encryption_handler):
+        """Return the password ciphertext, encrypting only if the password changed"""
+        plaintext = self._plaintext
+        if plaintext is None:
+            return self._ciphertext
+
+        ciphertext = encryption_handler.encrypt(plaintext) if plaintext else ""
+        self._store_ciphertext(plaintext, ciphertext, encryption_handler)
+        return ciphertext
+
+    def _store_ciphertext(self, plaintext, ciphertext, encryption_handler):
+        if plaintext:
+            encryption_handler.plaintext_cache.put(ciphertext, plaintext)
+        self._ciphertext = ciphertext
+        self._encryption_handler = encryption_handler
+        # A password set while this one was being encrypted stays pending
+        if self._plaintext is plaintext:
+            self._plaintext = None
+
+    @staticmethod
+    def encrypt_passwords(accounts, encryption_handler):
+        """Encrypt the pending passwords of several accounts in one batch"""
+        pending = [(account, account._plaintext) for account in accounts if account._plaintext]
+        ciphertexts = encryption_handler.encrypt_many(plaintext for _, plaintext in pending)
+        for (account, plaintext), ciphertext in zip(pending, ciphertexts):
+            account._store_ciphertext(plaintext, ciphertext, encryption_handler)
+
     def to_dict(self, encryption_handler):
         return {
+            "id": self.id,
             "name": self.name,
             "username": self.username,
-            "password": encryption_handler.encrypt(self.password) if self.password else "",
+            "password": self._encrypted_password(encryption_handler),
             "password_hint": self.password_hint,
             "auto_login": self.auto_login,
-            "games": [game.to_dict() for game in self.games]
+            "games": [game.to_dict() for game in list(self.games)]
         }
+
+    def to_json(self, encryption_handler):
+        """Serialize the account to JSON, reusing the previous output if nothing changed"""
+        revision = self._revision
+        cache = self._json_cache
+        if cache is not None and cache[0] == revision:
+            return cache[1]
+
+        data = json.dumps(self.to_dict(encryption_handler))
+        self._json_cache = (revision, data)
+        return data
     
     @classmethod
     def from_dict(cls, data, encryption_handler):
-        encrypted_password = data.get("password", "")
-        password = encryption_handler.decrypt(encrypted_password) if encrypted_password else ""
-        
         account = cls(
             data["name"], 
             data["username"], 
-            password,
+            "",
             data.get("password_hint", ""),
-            data.get("auto_login", False)
+            data.get("auto_login", False),
+            data.get("id")
         )
+        # The password is decrypted lazily, when a launch or the edit dialog needs it
+        account._ciphertext = data.get("password", "")
+        account._plaintext = None
+        account._encryption_handler = encryption_handler
         
-        for game_data in data.get("games", []):
-            account.games.append(Game.from_dict(game_data))
+        account.games.extend(Game.from_dict(game_data) for game_data in data.get("games", []))
         return account
 
 
@@ -47,25 +286,6 @@ class AddAccountDialog(QDialog):
         self.setWindowTitle("Add Steam Account")
         self.setMinimumWidth(400)
         
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #1a2634;
-            }
-            QLabel {
-                color: #ecf0f1;
-            }
-            QLineEdit {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QCheckBox {
-                color: #ecf0f1;
-            }
-        """)
-        
         self.layout = QFormLayout()
         
         self.name_edit = QLineEdit()
@@ -0,0 +1,775 @@
+"""Performance benchmarks for Game Vault.
+
+Run from the project directory, for example:
+
+    python -m benchmark storage --accounts 10000 --games 200000
+    python -m benchmark fallback
+    python -m benchmark memory --games 200000
+    python -m benchmark search --games 200000
+    python -m benchmark models
+    python -m benchmark palette --games 200000 --titles 200000
+    python -m benchmark theme
+    python -m benchmark launch
+    python -m benchmark instances --accounts 4
+    python -m benchmark processes
+"""
+import argparse
+import base64
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from account import SteamAccount
+from encryption import EncryptionHandler
+from game import Game
+
+
+def timed(label, func, *args, **kwargs):
+    """Run func once, print how long it took and return its result"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"  {label:<44} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def make_accounts(account_count, game_count, seed=0, titles=None):
+    """Build a synthetic vault with game_count games spread over account_count accounts
+
+    Games are drawn from about 2000 titles unless `titles` says how many.
+    """
+    rng = random.Random(seed)
+    accounts = [
+        SteamAccount(f"Account {i}", f"user{i}", f"password{i}", "", i % 2 == 0)
+        for i in range(account_count)
+    ]
+    for i in range(game_count):
+        app_id = str(rng.randrange(10, 2000) * 10 if titles is None else 10 + rng.randrange(titles))
+        accounts[i % account_count].games.append(
+            Game(f"Game {app_id}", app_id, f"C:\\Games\\{app_id}\\game.exe")
+        )
+    return accounts
+
+
+def bench_storage(args):
+    from sqlite_store import SqliteStore
+    from storage import JournalStore
+
+    handler = EncryptionHandler()
+    accounts = timed("build vault", make_accounts, args.accounts, args.games)
+    app_id = accounts[0].games[0].app_id
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [
+            ("json journal", JournalStore(os.path.join(tmp, "config.json"), handler)),
+            ("sqlite", SqliteStore(os.path.join(tmp, "config.db"), handler)),
+        ]
+        for label, store in stores:
+            print(f"{label} ({args.accounts} accounts, {args.games} games)")
+            timed("full save", store.save, "", accounts)
+
+            accounts[len(accounts) // 2].games[0].name = "Renamed"
+            timed("save after one edit", store.save, "", accounts)
+
+            _, loaded = timed("load", store.load)
+
+            if isinstance(store, SqliteStore):
+                owners = timed(f"accounts owning app {app_id}", store.find_accounts_by_app_id, app_id)
+                timed("games of one account", store.load_games, loaded[0].id)
+                store.close()
+            else:
+                owners = timed(f"accounts owning app {app_id}", lambda: [
+                    account.id for account in loaded if any(game.app_id == app_id for game in account.games)
+                ])
+                timed("games of one account (full load)", store.load)
+            print(f"  {len(owners)} accounts own app {app_id}")
+
+
+def legacy_fallback_encrypt(data):
+    """The original character-by-character fallback obfuscation, kept as a reference"""
+    key = "MultiSteamLauncher"
+    s = list(data)
+    for i, char in enumerate(s):
+        s[i] = chr(ord(char) ^ ord(key[i % len(key)]))
+    return base64.b64encode(''.join(s).encode()).decode()
+
+
+def legacy_fallback_decrypt(encrypted_data):
+    key = "MultiSteamLauncher"
+    s = base64.b64decode(encrypted_data.encode()).decode()
+    result = []
+    for i, char in enumerate(s):
+        result.append(chr(ord(char) ^ ord(key[i % len(key)])))
+    return ''.join(result)
+
+
+FALLBACK_CORPUS = [
+    "a",
+    "password",
+    "MultiSteamLauncher",
+    "MultiSteamLauncher!",
+    "correct horse battery staple",
+    "\x00\x01\x1f\x7f",
+    "tab\tnewline\n",
+    "p\u00e4ssw\u00f6rd",
+    "\u00ff\u0100\u07ff\u0800",
+    "\u5bc6\u7801\u5bc6\u7801",
+    "\u043f\u0430\u0440\u043e\u043b\u044c",
+    "emoji \U0001f3ae\U0001f511",
+    "\ud7ff\ue000\uffff\U0010ffff",
+    "x" * 1000,
+    "\u00e9" * 1000,
+]
+
+
+def bench_fallback(args):
+    handler = EncryptionHandler()
+
+    for sample in FALLBACK_CORPUS:
+        expected = legacy_fallback_encrypt(sample)
+        encrypted = handler._fallback_encrypt(sample)
+        assert encrypted == expected, f"encrypt mismatch for {sample[:20]!r}"
+        assert handler._fallback_decrypt(expected) == sample, f"decrypt mismatch for {sample[:20]!r}"
+        assert legacy_fallback_decrypt(encrypted) == sample
+    print(f"fallback format compatible on {len(FALLBACK_CORPUS)} corpus samples")
+
+    for label, sample in [("ascii", "password1234"), ("non-ascii", "p\u00e4ssw\u00f6rd\u5bc6\u7801")]:
+        items = [sample * (i % 4 + 1) for i in range(args.count)]
+        size = sum(len(item.encode()) for item in items) / 1e6
+        print(f"{label} ({args.count} strings, {size:.1f} MB)")
+        for name, encrypt, decrypt in [
+            ("legacy", legacy_fallback_encrypt, legacy_fallback_decrypt),
+            ("bytes", handler._fallback_encrypt, handler._fallback_decrypt),
+        ]:
+            encrypted = timed(f"{name} encrypt", lambda: [encrypt(item) for item in items])
+            timed(f"{name} decrypt", lambda: [decrypt(item) for item in encrypted])
+
+
+class LegacyGame:
+    """Game as it was before the catalog and __slots__, kept as a memory reference"""
+
+    def __init__(self, name, app_id, path, icon_path="", is_steam_game=True):
+        self.name = name
+        self.app_id = app_id
+        self.path = path
+        self.icon_path = icon_path
+        self.is_steam_game = is_steam_game
+
+
+def loaded_game_data(count, titles):
+    """Game dicts as json.load produces them, with separate string objects per game"""
+    return [
+        {"name": f"Game {i % titles}", "app_id": str(i % titles * 10), "path": f"C:\\Games\\{i % titles}\\game.exe"}
+        for i in range(count)
+    ]
+
+
+def measure_memory(label, build, count, titles):
+    gc.collect()
+    tracemalloc.start()
+    data = loaded_game_data(count, titles)
+    result = build(data)
+    del data
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<44} {size / 1e6:10.1f} MB  ({size / count:.0f} bytes/game)")
+    return result
+
+
+def bench_memory(args):
+    from game_table import GameTable
+
+    print(f"memory for {args.games} games ({args.titles} distinct titles)")
+    measure_memory("plain Game objects", lambda data: [
+        LegacyGame(d["name"], d["app_id"], d["path"]) for d in data
+    ], args.games, args.titles)
+    measure_memory("plain Game objects in (account, game) tuples", lambda data: [
+        (None, LegacyGame(d["name"], d["app_id"], d["path"])) for d in data
+    ], args.games, args.titles)
+    measure_memory("slotted catalog-backed Game objects", lambda data: [
+        Game(d["name"], d["app_id"], d["path"]) for d in data
+    ], args.games, args.titles)
+
+    def build_table(data):
+        table = GameTable()
+        for d in data:
+            table.append(d["name"], d["app_id"], d["path"])
+        return table
+    measure_memory("GameTable columns", build_table, args.games, args.titles)
+
+
+def bench_search(args):
+    from PyQt5.QtCore import QCoreApplication
+    from models import GameListModel
+    from registry import VaultRegistry
+    from search import VaultSearch
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    accounts = make_accounts(args.accounts, args.games)
+    registry = VaultRegistry()
+    registry.set_accounts(accounts)
+    search = timed("build search index", VaultSearch, registry)
+    model = GameListModel(registry)
+    timed("fill the all-games list", model.show_all)
+    games = [game for _, game in registry.all_games()]
+
+    frame_budget = 16.0
+    for attempt in ("first", "second"):
+        print(f"typing {args.query!r} into the game filter ({args.games} games), {attempt} time")
+        worst = type_query(model, search, games, args.query)
+        print(f"  worst keystroke {worst:.2f} ms ({'within' if worst <= frame_budget else 'over'} the {frame_budget:.0f} ms frame)")
+        model.set_filter(None)
+
+    game = games[len(games) // 2]
+    timed("rename one game (index and list update)", setattr, game, "name", "Renamed Game 12")
+    del app
+
+
+def check_models(args):
+    """Filter and sort the game list through random edits, checking it against a full scan after each"""
+    from PyQt5.QtCore import QCoreApplication
+    from facets import FacetSelection, VaultFacets
+    from models import GameListModel
+    from registry import VaultRegistry
+    from search import VaultSearch
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    tags = ["mp", "rpg", "indie"]
+
+    def make_vault(registry):
+        # As in the app, the indexes are created before the model
+        VaultSearch(registry)
+        facets = VaultFacets(registry)
+        model = GameListModel(registry)
+        model.show_all()
+        return facets, model
+
+    def facet_filter(model, facets, selection):
+        model.set_filter(lambda game: facets.matches(game, selection),
+                         lambda games, cancelled=None: facets.select(games, selection, cancelled))
+
+    def check(model, selection, facets, label):
+        rows = [model.at(row) for row in range(model.rowCount())]
+        shown = model.objects()
+        expected = [game for game in shown if facets.matches(game, selection)] if selection else list(shown)
+        assert rows == expected, f"{label}: filtered rows do not follow the shown order"
+        games = [game for account in model.registry.accounts for game in account.games]
+        if model._order is None:
+            assert list(shown) == games, f"{label}: vault order differs"
+        else:
+            keys = [model._order.key(game) for game in shown]
+            assert keys == sorted(keys) and set(shown) == set(games), f"{label}: sort order is stale"
+
+    # A game moving within its sort order must not leave the facet filter
+    # picking out the games by their old positions
+    registry = VaultRegistry()
+    account = SteamAccount("Account", "account")
+    account.games.extend([Game("One", "10", ""), Game("Two", "20", ""), Game("Three", "30", "")])
+    registry.set_accounts([account])
+    facets, model = make_vault(registry)
+    account.games[0].tags = {"mp"}
+    model.sort_by("app_id")
+    selection = FacetSelection(tags={"mp"})
+    facet_filter(model, facets, selection)
+    account.games[0].app_id = "25"
+    facet_filter(model, facets, selection)
+    assert [model.at(row).name for row in range(model.rowCount())] == ["One"], "facet filter after a move"
+    print("  facet filter after a game moves in its sort order: ok")
+
+    # A hidden sort order must follow an account rename
+    model.set_filter(None)
+    other = SteamAccount("Other", "other")
+    other.games.append(Game("Four", "40", ""))
+    registry.add_account(other)
+    model.sort_by("account")
+    model.sort_by(None)
+    account.name = "Zed"
+    model.sort_by("account")
+    check(model, None, facets, "hidden order after a rename")
+    print("  hidden sort order after an account rename: ok")
+
+    for seed in range(args.seeds):
+        rng = random.Random(seed)
+        registry = VaultRegistry()
+        registry.set_accounts(make_accounts(4, 24))
+        facets, model = make_vault(registry)
+        selection = None
+        for step in range(args.steps):
+            accounts = registry.accounts
+            game = rng.choice([game for account in accounts for game in account.games] or [None])
+            action = rng.randrange(8)
+            if action == 0 and game is not None:
+                game.tags = rng.sample(tags, rng.randrange(len(tags) + 1))
+            elif action == 1 and game is not None:
+                game.app_id = str(rng.randrange(50))
+            elif action == 2 and game is not None:
+                game.name = f"Game {rng.randrange(50)}"
+            elif action == 3:
+                rng.choice(accounts).name = f"Account {rng.randrange(50)}"
+            elif action == 4:
+                rng.choice(accounts).games.append(Game(f"Game {rng.randrange(50)}", str(rng.randrange(50)), ""))
+            elif action == 5 and game is not None:
+                game._owner.games.remove(game)
+            elif action == 6:
+                model.sort_by(rng.choice([None, "name", "app_id", "account"]))
+            else:
+                selection = FacetSelection(tags=rng.sample(tags, rng.randrange(2))) if rng.random() < 0.8 else None
+            if selection:
+                facet_filter(model, facets, selection)
+            else:
+                model.set_filter(None)
+            check(model, selection, facets, f"seed {seed} step {step}")
+    print(f"  {args.seeds} random edit sequences of {args.steps} steps: ok")
+    del app
+
+
+def type_query(model, search, games, text):
+    """Filter the model as if text was typed one character at a time; return the slowest keystroke"""
+    from search import VaultSearch
+
+    worst = 0.0
+    previous = ""
+    for length in range(1, len(text) + 1):
+        query = VaultSearch.normalize(text[:length])
+        start = time.perf_counter()
+        model.set_filter(
+            lambda game: search.game_matches(game, query, True),
+            lambda games: search.select_games(games, query, True),
+            bool(previous) and previous in query
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = max(worst, elapsed)
+        previous = query
+
+        start = time.perf_counter()
+        expected = [
+            game for game in games
+            if query in game.name.lower() or query in game.app_id.lower() or query in game._owner.name.lower()
+        ]
+        scan = (time.perf_counter() - start) * 1000
+        assert [model.at(row) for row in range(model.rowCount())] == expected, f"mismatch for {query!r}"
+        print(f"  {query!r:<14} {model.rowCount():7} rows  index {elapsed:7.2f} ms   full scan {scan:7.1f} ms")
+    return worst
+
+
+def bench_palette(args):
+    from PyQt5.QtCore import QCoreApplication
+    from palette import PaletteIndex
+    from registry import VaultRegistry
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    accounts = make_accounts(args.accounts, args.games, titles=args.titles)
+    registry = VaultRegistry()
+    registry.set_accounts(accounts)
+    index = timed("build palette index", PaletteIndex, registry)
+    games = [game for _, game in registry.all_games()]
+    rng = random.Random(1)
+    for game in rng.sample(games, 10):
+        index.record_launch(game)
+    print(f"{len(index)} entries, {len(index._ordered)} distinct texts")
+    # The palette prepares its index when it opens, before the first keystroke
+    timed("prepare on open", index.prepare)
+
+    frame_budget = 16.0
+    worst = 0.0
+    for text in args.queries:
+        print(f"typing {text!r} into the palette")
+        for length in range(1, len(text) + 1):
+            query = text[:length]
+            start = time.perf_counter()
+            results = index.search(query, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            worst = max(worst, elapsed)
+            best = getattr(results[0], "name", getattr(results[0], "label", "")) if results else ""
+            print(f"  {query!r:<14} {len(results):4} results  {elapsed:7.2f} ms   best {best!r}")
+    print(f"  worst keystroke {worst:.2f} ms ({'within' if worst <= frame_budget else 'over'} the {frame_budget:.0f} ms frame)")
+    del app
+
+
+def style_per_widget(widget):
+    """Style a widget the way every themed widget used to: its own stylesheet and a shadow effect per button"""
+    from PyQt5.QtGui import QColor
+    from PyQt5.QtWidgets import QGraphicsDropShadowEffect
+    from ui import THEME, ModernStyledButton
+
+    widget.setStyleSheet(THEME)
+    for button in widget.findChildren(ModernStyledButton):
+        button.setStyleSheet(THEME)
+        shadow = QGraphicsDropShadowEffect(button)
+        shadow.setBlurRadius(15)
+        shadow.setColor(QColor(0, 0, 0, 80))
+        shadow.setOffset(0, 2)
+        button.setGraphicsEffect(shadow)
+
+
+def bench_theme(args):
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication, QVBoxLayout, QWidget
+    from game import GameDialog
+    from ui import ModernStyledButton, apply_theme
+
+    app = QApplication.instance() or QApplication([])
+    app.setStyle("Fusion")
+    accounts = make_accounts(args.accounts, args.accounts)
+
+    def open_dialog(legacy):
+        dialog = GameDialog(accounts)
+        if legacy:
+            style_per_widget(dialog)
+        dialog.show()
+        app.processEvents()
+        dialog.close()
+        dialog.deleteLater()
+        # No event loop runs here to delete it
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    def button_panel(legacy):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        for i in range(args.buttons):
+            layout.addWidget(ModernStyledButton(f"Button {i}"))
+        if legacy:
+            style_per_widget(panel)
+        panel.show()
+        app.processEvents()
+        return panel
+
+    for label, legacy in (("per-widget stylesheets and shadow effects", True), ("one application theme and cached shadows", False)):
+        app.setStyleSheet("")
+        if not legacy:
+            apply_theme(app)
+        print(label)
+        open_dialog(legacy)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            open_dialog(legacy)
+        print(f"  {'open the game dialog':<44} {(time.perf_counter() - start) * 1000 / args.repeat:10.2f} ms")
+
+        panel = timed(f"construct {args.buttons} buttons", button_panel, legacy)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            panel.repaint()
+        print(f"  {'repaint them':<44} {(time.perf_counter() - start) * 1000 / args.repeat:10.2f} ms")
+        panel.close()
+        panel.deleteLater()
+        app.sendPostedEvents(None, QEvent.DeferredDelete)
+    del app
+
+
+FAKE_STEAM = r"""#!{python}
+# Stand-in for the Steam client: signs in after a delay, then runs until stopped
+import os, signal, sys, time, zlib
+if os.environ.get("MSL_STEAM_INSTANCE"):
+    # Like Steam, keep the data of an isolated instance under its own XDG data directory
+    steam_dir = os.path.join(os.environ["XDG_DATA_HOME"], "Steam")
+else:
+    steam_dir = os.path.dirname(os.path.abspath(__file__))
+args = sys.argv[1:]
+
+
+def write_registry(account_id):
+    with open(os.path.join(steam_dir, "registry.vdf"), "w") as f:
+        f.write('"Registry"\n{\n\t"HKCU"\n\t{\n\t\t"Software"\n\t\t{\n\t\t\t"Valve"\n\t\t\t{\n\t\t\t\t"Steam"\n\t\t\t\t{\n'
+                '\t\t\t\t\t"ActiveProcess"\n\t\t\t\t\t{\n\t\t\t\t\t\t"pid"\t\t"%d"\n\t\t\t\t\t\t"ActiveUser"\t\t"%d"\n'
+                '\t\t\t\t\t}\n\t\t\t\t}\n\t\t\t}\n\t\t}\n\t}\n}\n' % (os.getpid(), account_id))
+
+
+if "-applaunch" in args:
+    with open(os.path.join(steam_dir, "logs", "applaunch.txt"), "a") as f:
+        f.write(args[args.index("-applaunch") + 1] + "\n")
+    sys.exit(0)
+
+# Like Steam, clear the signed-in account on the way out
+signal.signal(signal.SIGTERM, lambda signum, frame: (write_registry(0), sys.exit(0)))
+write_registry(0)
+if "-login" in args:
+    username = args[args.index("-login") + 1]
+    account_id = zlib.crc32(username.encode()) or 1
+    time.sleep(float(os.environ.get("FAKE_STEAM_DELAY", "1")))
+    with open(os.path.join(steam_dir, "config", "loginusers.vdf"), "w") as f:
+        f.write('"users"\n{\n\t"%d"\n\t{\n\t\t"AccountName"\t\t"%s"\n\t\t"MostRecent"\t\t"1"\n\t\t"Timestamp"\t\t"%d"\n\t}\n}\n'
+                % (76561197960265728 + account_id, username, time.time()))
+    with open(os.path.join(steam_dir, "logs", "connection_log.txt"), "a") as f:
+        f.write("[Logged On] [U:1:%d]\n" % account_id)
+    write_registry(account_id)
+time.sleep(300)
+"""
+
+
+def make_fake_steam(directory):
+    """Write a stand-in steam executable and its config and logs directories; return its path"""
+    os.makedirs(os.path.join(directory, "config"))
+    os.makedirs(os.path.join(directory, "logs"))
+    path = os.path.join(directory, "steam")
+    with open(path, "w") as f:
+        f.write(FAKE_STEAM.replace("{python}", sys.executable))
+    os.chmod(path, 0o755)
+    return path
+
+
+def steam_clients(steam_path):
+    """The running Steam clients split into (stand-ins running the script at steam_path, the others)"""
+    import psutil
+    from process_monitor import ProcessMonitor
+
+    stand_ins, others = [], []
+    for process in ProcessMonitor.shared().steam_processes(fresh=True):
+        try:
+            (stand_ins if steam_path in process.cmdline() else others).append(process)
+        except psutil.Error:
+            continue
+    return stand_ins, others
+
+
+def real_steam_running(steam_path, skipped):
+    """Whether a Steam client other than the stand-in runs; logins without an instance would stop it"""
+    if steam_clients(steam_path)[1]:
+        print(f"  skipping {skipped}: a Steam client is running, and signing in without an isolated instance stops it")
+        return True
+    return False
+
+
+def stop_stand_ins(steam_path):
+    from process_monitor import ProcessMonitor
+
+    ProcessMonitor.shared().terminate(steam_clients(steam_path)[0])
+
+
+def run_launches(app, scheduler, steam_path, requests, cancel_after=None):
+    """Queue (username, app_id) launches at once and wait for the scheduler to finish them.
+
+    Returns the seconds taken, counted from the cancel if `cancel_after`
+    seconds in everything is cancelled, and the progress messages.
+    """
+    messages = []
+    idle = [False]
+
+    def queue_changed(pending):
+        idle[0] = pending == 0
+
+    scheduler.launch_progress.connect(messages.append)
+    scheduler.queue_changed.connect(queue_changed)
+    start = time.perf_counter()
+    for username, app_id in requests:
+        scheduler.submit(steam_path, username, app_id=app_id)
+    cancelled = None
+    while not idle[0]:
+        if cancel_after is not None and cancelled is None and time.perf_counter() - start >= cancel_after:
+            scheduler.cancel()
+            cancelled = time.perf_counter()
+        # Deliver the signals the worker queued for this thread
+        app.processEvents()
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - (cancelled or start)
+    scheduler.launch_progress.disconnect(messages.append)
+    scheduler.queue_changed.disconnect(queue_changed)
+    return elapsed, messages
+
+
+def bench_launch(args):
+    from PyQt5.QtCore import QCoreApplication
+    from launcher import LaunchScheduler
+
+    if os.name == 'nt':
+        print("the launch benchmark runs a stand-in steam script and needs Linux or macOS")
+        return
+    app = QCoreApplication.instance() or QCoreApplication([])
+    fixed = 1 + 5 + 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        steam_path = make_fake_steam(directory)
+        if real_steam_running(steam_path, "the launch benchmark"):
+            del app
+            return
+        scheduler = LaunchScheduler(steam_dir=directory)
+        scheduler.start()
+
+        def launch(*requests, cancel_after=None):
+            return run_launches(app, scheduler, steam_path, requests, cancel_after)
+
+        def launched_games():
+            with open(os.path.join(directory, "logs", "applaunch.txt")) as f:
+                return len(f.read().split())
+
+        for i, delay in enumerate(args.delays):
+            os.environ["FAKE_STEAM_DELAY"] = str(delay)
+            # A different account each time, so each one is a real switch
+            elapsed, log = launch((f"user{i}", "440"))
+            confirmed = "Could not confirm the login, continuing..." not in log
+            print(f"  steam signs in after {delay:4.1f} s: launched in {elapsed:5.2f} s "
+                  f"({'sign-in seen' if confirmed else 'sign-in not seen'}), fixed sleeps took {fixed} s")
+
+        username = f"user{len(args.delays) - 1}"
+        elapsed, log = launch((username, "570"))
+        skipped = f"Steam is already signed in as {username}" in log
+        print(f"  second game on the same account: launched in {elapsed:5.2f} s "
+              f"({'relaunch skipped' if skipped else 'relaunched'})")
+
+        # Clicks on two accounts in turn, one of them a double click
+        os.environ["FAKE_STEAM_DELAY"] = str(args.delays[0])
+        burst = [("alice", "10"), ("bob", "20"), ("alice", "30"), ("alice", "10"), ("bob", "40")]
+        before = launched_games()
+        elapsed, log = launch(*burst)
+        logins = log.count("Launching Steam with account credentials...")
+        print(f"  {len(burst)} clicks on 2 accounts: {logins} logins, {launched_games() - before} games "
+              f"launched in {elapsed:5.2f} s; a login per click would sign in {len(burst)} times")
+
+        os.environ["FAKE_STEAM_DELAY"] = str(max(args.delays))
+        elapsed, log = launch(("carol", "50"), cancel_after=0.5)
+        print(f"  login cancelled while steam signs in: worker free {elapsed:5.2f} s after the cancel")
+
+        scheduler.stop()
+        stop_stand_ins(steam_path)
+    del app
+
+
+def bench_instances(args):
+    from PyQt5.QtCore import QCoreApplication
+    from instances import InstancePool, supported
+    from launcher import LaunchScheduler
+    from steam_state import SteamState
+
+    if not supported():
+        print("the instances benchmark runs isolated Steam instances and needs Linux")
+        return
+    app = QCoreApplication.instance() or QCoreApplication([])
+    os.environ["FAKE_STEAM_DELAY"] = str(args.delay)
+    requests = [(f"user{i}", str(440 + i)) for i in range(args.accounts)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        steam_path = make_fake_steam(directory)
+        os.makedirs(os.path.join(directory, "steamapps"))
+        print(f"launching a game on each of {args.accounts} accounts, steam signs in after {args.delay} s")
+
+        # Isolated instances leave other Steam clients alone, the shared client does not
+        if not real_steam_running(steam_path, "the run on one steam client"):
+            scheduler = LaunchScheduler(steam_dir=directory)
+            scheduler.start()
+            elapsed, _ = run_launches(app, scheduler, steam_path, requests)
+            scheduler.stop()
+            print(f"  {'one steam client, one account at a time':<44} {elapsed:6.2f} s, "
+                  f"{len(steam_clients(steam_path)[0])} client left running")
+            stop_stand_ins(steam_path)
+
+        pool = InstancePool(os.path.join(directory, "instances"), args.accounts)
+        scheduler = LaunchScheduler(pool=pool)
+        scheduler.start()
+        elapsed, _ = run_launches(app, scheduler, steam_path, requests)
+        running = pool.instances()
+        print(f"  {'isolated instances, in parallel':<44} {elapsed:6.2f} s, {len(running)} clients left running")
+
+        for username, app_id in requests:
+            instance = running.get(username)
+            if instance is None:
+                print(f"    {username}: not running")
+                continue
+            with open(os.path.join(instance.steam_dir, "logs", "applaunch.txt")) as f:
+                launched = f.read().split()
+            account = SteamState(steam_path, instance.steam_dir, home=instance.home).signed_in_account(instance.processes())
+            shared = os.path.islink(os.path.join(instance.steam_dir, "steamapps"))
+            print(f"    {username}: pid {instance.pid}, signed in as {account}, launched {' '.join(launched)}"
+                  f"{', library shared' if shared else ''}")
+
+        # Another game on the first account leaves the other clients alone
+        elapsed, log = run_launches(app, scheduler, steam_path, [(requests[0][0], "570")])
+        skipped = f"Steam is already signed in as {requests[0][0]}" in log
+        print(f"  second game on {requests[0][0]}: {elapsed:5.2f} s ({'relaunch skipped' if skipped else 'relaunched'}), "
+              f"{len(pool.instances())} clients still running")
+
+        scheduler.stop()
+        pool.stop_all()
+    del app
+
+
+def bench_processes(args):
+    import subprocess
+    from process_monitor import ProcessMonitor
+
+    if os.name == 'nt':
+        shell_query = "tasklist | findstr steam.exe"
+    else:
+        shell_query = "ps aux | grep -v grep | grep steam"
+
+    def run_shell():
+        # As the launcher used to ask whether Steam is running
+        subprocess.call(shell_query, shell=True, stdout=subprocess.DEVNULL)
+
+    monitor = ProcessMonitor()
+    print(f"asking {args.queries} times whether Steam is running")
+    for label, query in (
+        ("shell pipeline", run_shell),
+        ("psutil scan every time", lambda: monitor.steam_running(fresh=True)),
+        ("cached ProcessMonitor", monitor.steam_running),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            query()
+        print(f"  {label:<44} {(time.perf_counter() - start) * 1000 / args.queries:10.2f} ms per query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game Vault performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    storage = subparsers.add_parser("storage", help="compare the JSON journal and SQLite backends")
+    storage.add_argument("--accounts", type=int, default=10000)
+    storage.add_argument("--games", type=int, default=200000)
+    storage.set_defaults(func=bench_storage)
+
+    fallback = subparsers.add_parser("fallback", help="check and time the fallback obfuscation")
+    fallback.add_argument("--count", type=int, default=100000)
+    fallback.set_defaults(func=bench_fallback)
+
+    memory = subparsers.add_parser("memory", help="compare the memory footprint of game representations")
+    memory.add_argument("--games", type=int, default=200000)
+    memory.add_argument("--titles", type=int, default=2000)
+    memory.set_defaults(func=bench_memory)
+
+    search = subparsers.add_parser("search", help="time the game filter per keystroke")
+    search.add_argument("--accounts", type=int, default=1000)
+    search.add_argument("--games", type=int, default=200000)
+    search.add_argument("--query", default="game 123")
+    search.set_defaults(func=bench_search)
+
+    models = subparsers.add_parser("models", help="check the filtered and sorted game list against random edits")
+    models.add_argument("--seeds", type=int, default=150)
+    models.add_argument("--steps", type=int, default=60)
+    models.set_defaults(func=check_models)
+
+    palette = subparsers.add_parser("palette", help="time the command palette per keystroke")
+    palette.add_argument("--accounts", type=int, default=1000)
+    palette.add_argument("--games", type=int, default=200000)
+    palette.add_argument("--titles", type=int, default=None, help="number of distinct game titles")
+    palette.add_argument("--limit", type=int, default=20)
+    palette.add_argument("--queries", nargs="+", default=["game 123", "gm12", "account 7", "zzz"])
+    palette.set_defaults(func=bench_palette)
+
+    theme = subparsers.add_parser("theme", help="time dialog opening and button painting with the application theme")
+    theme.add_argument("--accounts", type=int, default=50, help="accounts listed in the game dialog")
+    theme.add_argument("--buttons", type=int, default=20)
+    theme.add_argument("--repeat", type=int, default=50)
+    theme.set_defaults(func=bench_theme)
+
+    launch = subparsers.add_parser("launch", help="time account switches against a stand-in steam script")
+    launch.add_argument("--delays", type=float, nargs="+", default=[0.5, 2.0, 7.0], help="seconds the stand-in takes to sign in")
+    launch.set_defaults(func=bench_launch)
+
+    instances = subparsers.add_parser("instances", help="launch on several accounts at once in isolated steam instances")
+    instances.add_argument("--accounts", type=int, default=4)
+    instances.add_argument("--delay", type=float, default=2.0, help="seconds the stand-in takes to sign in")
+    instances.set_defaults(func=bench_instances)
+
+    processes = subparsers.add_parser("processes", help="compare shell and psutil process queries")
+    processes.add_argument("--queries", type=int, default=50)
+    processes.set_defaults(func=bench_processes)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
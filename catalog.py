@@ -0,0 +1,95 @@
+import json
+import sys
+import threading
+
+GAME_FIELDS = ("name", "app_id", "path", "icon_path", "is_steam_game")
+
+
+class CatalogEntry:
+    """Metadata of one title, shared by every account that owns it"""
+    __slots__ = GAME_FIELDS + ("key",)
+
+    def __init__(self, key, name, app_id, path, icon_path="", is_steam_game=True):
+        self.key = key
+        self.name = sys.intern(name)
+        self.app_id = sys.intern(app_id)
+        self.path = sys.intern(path)
+        self.icon_path = sys.intern(icon_path)
+        self.is_steam_game = is_steam_game
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in GAME_FIELDS}
+
+
+class GameCatalog:
+    """Process-wide catalog of titles, keyed by Steam app ID or, for non-Steam games, by path.
+
+    Games reference an entry and only store the fields where they differ
+    from it, so a title owned by many accounts is kept once in memory and
+    once in the config file.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def key_for(app_id, path, is_steam_game):
+        if is_steam_game and app_id:
+            return f"app:{app_id}"
+        return f"path:{path}"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def intern(self, name, app_id, path, icon_path="", is_steam_game=True):
+        """Return the entry for this title, creating it from these values if it is new"""
+        key = self.key_for(app_id, path, is_steam_game)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = CatalogEntry(key, name, app_id, path, icon_path, is_steam_game)
+                    self._entries[key] = entry
+        return entry
+
+    def keys(self):
+        return list(self._entries)
+
+    def prune(self, keys_in_use):
+        """Drop entries that no game refers to any more"""
+        with self._lock:
+            for key in [key for key in self._entries if key not in keys_in_use]:
+                del self._entries[key]
+
+    def load(self, entries):
+        """Add serialized entries, keeping any entry that already exists"""
+        with self._lock:
+            for key, data in entries.items():
+                if key not in self._entries:
+                    self._entries[key] = CatalogEntry(
+                        key,
+                        data["name"],
+                        data["app_id"],
+                        data["path"],
+                        data.get("icon_path", ""),
+                        data.get("is_steam_game", True)
+                    )
+
+    def to_json(self, keys):
+        """Serialize the given entries, one JSON fragment per entry"""
+        return [f"{json.dumps(key)}: {json.dumps(self._entries[key].to_dict())}" for key in keys]
@@ -3,3 +3,21 @@ import os
 
 CONFIG_PATH = os.path.join(os.path.expanduser("~"), "multi_steam_launcher_config.json")
 ENCRYPTION_KEY_PATH = os.path.join(os.path.expanduser("~"), ".msl_key")
+# Set to None to derive the fallback key on every start instead of caching it
+FALLBACK_KEY_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".msl_fallback_key")
+DATABASE_PATH = os.path.join(os.path.expanduser("~"), "multi_steam_launcher.db")
+
+# "journal" keeps the vault in CONFIG_PATH, "sqlite" in DATABASE_PATH
+STORAGE_BACKEND = os.environ.get("MSL_STORAGE_BACKEND", "journal")
+
+# Seconds to wait for Steam to close, to start and sign in, and to take a
+# game launch, before carrying on without it
+STEAM_SHUTDOWN_TIMEOUT = float(os.environ.get("MSL_STEAM_SHUTDOWN_TIMEOUT", "10"))
+STEAM_LOGIN_TIMEOUT = float(os.environ.get("MSL_STEAM_LOGIN_TIMEOUT", "60"))
+STEAM_APPLAUNCH_TIMEOUT = float(os.environ.get("MSL_STEAM_APPLAUNCH_TIMEOUT", "10"))
+
+# Set MSL_STEAM_MULTI_INSTANCE=1 on Linux to run each account's Steam client in
+# its own home directory under STEAM_INSTANCE_ROOT, up to STEAM_MAX_INSTANCES at once
+STEAM_MULTI_INSTANCE = os.environ.get("MSL_STEAM_MULTI_INSTANCE", "0") == "1"
+STEAM_INSTANCE_ROOT = os.environ.get("MSL_STEAM_INSTANCE_ROOT", os.path.join(os.path.expanduser("~"), ".msl_instances"))
+STEAM_MAX_INSTANCES = int(os.environ.get("MSL_STEAM_MAX_INSTANCES", "4"))
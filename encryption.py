@@ -3,23 +3,129 @@ from config import *
 
 import base64
 import hashlib
+import json
 import os
 import shutil
+import threading
 import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from cryptography.fernet import Fernet
 
-class EncryptionHandler:
-    def __init__(self):
-        self.key = self._load_or_create_key()
-        if self.key:
-            self.cipher = Fernet(self.key)
-        else:
-            self.cipher = None
-            
+
+FALLBACK_KEY = "MultiSteamLauncher"
+FALLBACK_KEY_ASCII = FALLBACK_KEY.encode('ascii')
+FALLBACK_KEY_UTF32 = FALLBACK_KEY.encode('utf-32-le')
+
+
+def _xor_with_key(data, key):
+    """XOR data with the key repeated to its length, in a single big-integer operation"""
+    size = len(data)
+    stream = (key * (size // len(key) + 1))[:size]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(stream, 'little')).to_bytes(size, 'little')
+
+
+class PlaintextCache:
+    """Small cache of decrypted secrets, keyed by ciphertext.
+
+    Holds at most `max_entries` secrets and forgets each one `ttl` seconds
+    after it was decrypted, so only recently used passwords stay in memory.
+    """
+
+    def __init__(self, max_entries=8, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class KeyProvider:
+    """Loads the encryption key once per process and shares the cipher between threads.
+
+    The key file's mtime is checked at most every `check_interval` seconds, and
+    the key is reloaded when it changed, so a rotated key is picked up by every
+    handler using this provider.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    # Machine ID and derived fallback keys are computed once per process
+    _machine_id = None
+    _fallback_keys = {}
+    _fallback_lock = threading.Lock()
+    fallback_stats = {
+        "machine_id_lookups": 0,
+        "derivations": 0,
+        "derivation_seconds": 0.0,
+        "disk_cache_hits": 0
+    }
+
+    def __init__(self, key_file=ENCRYPTION_KEY_PATH, check_interval=2.0, fallback_cache_path=FALLBACK_KEY_CACHE_PATH):
+        self.key_file = key_file
+        self.fallback_cache_path = fallback_cache_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._mtime = None
+        self._next_check = 0.0
+
+    @classmethod
+    def shared(cls):
+        """The provider used by every EncryptionHandler that is not given its own"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def current(self):
+        """Return the current (key, cipher) pair, reloading it if the key file changed"""
+        state = self._state
+        if state is not None and time.monotonic() < self._next_check:
+            return state
+
+        with self._lock:
+            if self._state is None or time.monotonic() >= self._next_check:
+                mtime = self._key_mtime()
+                if self._state is None or mtime != self._mtime:
+                    key = self._load_or_create_key()
+                    self._state = (key, Fernet(key) if key else None)
+                    self._mtime = self._key_mtime()
+                self._next_check = time.monotonic() + self.check_interval
+            return self._state
+
+    def _key_mtime(self):
+        try:
+            return os.stat(self.key_file).st_mtime_ns
+        except OSError:
+            return None
+
     def _load_or_create_key(self):
-        key_file = ENCRYPTION_KEY_PATH
+        key_file = self.key_file
         
         try:
             if os.path.exists(key_file):
@@ -77,22 +183,75 @@ class EncryptionHandler:
         """Generate a key based on machine ID as fallback"""
         try:
             machine_id = self._get_machine_id()
-            
-            key_material = hashlib.pbkdf2_hmac(
-                'sha256', 
-                machine_id.encode(), 
-                b'MultiSteamLauncher', 
-                100000
-            )
-            
-            key = base64.urlsafe_b64encode(key_material)
+
+            with KeyProvider._fallback_lock:
+                key = KeyProvider._fallback_keys.get(machine_id)
+                if key is None:
+                    key = self._read_fallback_cache(machine_id)
+                if key is None:
+                    start = time.perf_counter()
+                    key_material = hashlib.pbkdf2_hmac(
+                        'sha256', 
+                        machine_id.encode(), 
+                        b'MultiSteamLauncher', 
+                        100000
+                    )
+                    key = base64.urlsafe_b64encode(key_material)
+
+                    elapsed = time.perf_counter() - start
+                    stats = KeyProvider.fallback_stats
+                    stats["derivations"] += 1
+                    stats["derivation_seconds"] += elapsed
+                    print(f"Derived fallback key in {elapsed * 1000:.0f} ms "
+                          f"({stats['derivations']} derivation(s) this session)")
+                    self._write_fallback_cache(machine_id, key)
+                KeyProvider._fallback_keys[machine_id] = key
             return key
             
         except:
             return Fernet.generate_key()
+
+    def _fallback_cache_tag(self, machine_id):
+        return hashlib.sha256(machine_id.encode()).hexdigest()
+
+    def _read_fallback_cache(self, machine_id):
+        """Return the derived key cached on disk for this machine, if any"""
+        if not self.fallback_cache_path:
+            return None
+        try:
+            with open(self.fallback_cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get("machine") != self._fallback_cache_tag(machine_id):
+                return None
+            key = cached["key"].encode()
+            if not self._is_valid_key(key):
+                return None
+            KeyProvider.fallback_stats["disk_cache_hits"] += 1
+            return key
+        except:
+            return None
+
+    def _write_fallback_cache(self, machine_id, key):
+        """Cache the derived key on disk, readable by the current user only"""
+        # An ID made up after the lookup failed will not match on the next start
+        if not self.fallback_cache_path or machine_id.startswith("msl-"):
+            return
+        try:
+            fd = os.open(self.fallback_cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"machine": self._fallback_cache_tag(machine_id), "key": key.decode()}, f)
+        except:
+            pass
     
     def _get_machine_id(self):
-        """Get a unique identifier for this machine"""
+        """Get a unique identifier for this machine, looking it up only once per process"""
+        with KeyProvider._fallback_lock:
+            if KeyProvider._machine_id is None:
+                KeyProvider.fallback_stats["machine_id_lookups"] += 1
+                KeyProvider._machine_id = self._lookup_machine_id()
+            return KeyProvider._machine_id
+
+    def _lookup_machine_id(self):
         try:
             if os.name == 'nt':  # Windows
                 import subprocess
@@ -108,15 +267,37 @@ class EncryptionHandler:
                 return str(mac)
         except:
             return f"msl-{int(time.time())}-{os.getpid()}"
-    
+
+
+class EncryptionHandler:
+    # Batches smaller than this are not worth handing to the worker pool
+    BATCH_THRESHOLD = 64
+    WORKERS = min(8, os.cpu_count() or 1)
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, key_provider=None):
+        self.key_provider = key_provider or KeyProvider.shared()
+        self.plaintext_cache = PlaintextCache()
+
+    @property
+    def key(self):
+        return self.key_provider.current()[0]
+
+    @property
+    def cipher(self):
+        return self.key_provider.current()[1]
+
     def encrypt(self, data):
         if not data:
             return ""
-        if not self.cipher:
+        cipher = self.cipher
+        if not cipher:
             return self._fallback_encrypt(data)
             
         try:
-            return self.cipher.encrypt(data.encode()).decode()
+            return cipher.encrypt(data.encode()).decode()
         except Exception as e:
             print(f"Encryption error: {str(e)}")
             return self._fallback_encrypt(data)
@@ -124,34 +305,71 @@ class EncryptionHandler:
     def decrypt(self, encrypted_data):
         if not encrypted_data:
             return ""
-        if not self.cipher:
+        cipher = self.cipher
+        if not cipher:
             return self._fallback_decrypt(encrypted_data)
             
         try:
-            return self.cipher.decrypt(encrypted_data.encode()).decode()
+            return cipher.decrypt(encrypted_data.encode()).decode()
         except Exception as e:
             print(f"Decryption error: {str(e)}")
             return self._fallback_decrypt(encrypted_data)
     
+    @classmethod
+    def _worker_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(cls.WORKERS, thread_name_prefix="msl-crypto")
+            return cls._pool
+
+    def _map(self, func, items):
+        """Apply func to every item across the worker pool, keeping the input order"""
+        items = list(items)
+        if len(items) < self.BATCH_THRESHOLD:
+            return [func(item) for item in items]
+
+        pool = self._worker_pool()
+        chunk_size = -(-len(items) // self.WORKERS)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        results = []
+        for chunk_result in pool.map(lambda chunk: [func(item) for item in chunk], chunks):
+            results.extend(chunk_result)
+        return results
+
+    def encrypt_many(self, items):
+        """Encrypt several strings, returning the results in the same order"""
+        return self._map(self.encrypt, items)
+
+    def decrypt_cached(self, encrypted_data):
+        """Decrypt, reusing the result of a recent decryption of the same data"""
+        plaintext = self.plaintext_cache.get(encrypted_data)
+        if plaintext is None:
+            plaintext = self.decrypt(encrypted_data)
+            self.plaintext_cache.put(encrypted_data, plaintext)
+        return plaintext
+
     def _fallback_encrypt(self, data):
         """Simple obfuscation as fallback (not secure, but better than plaintext)"""
         try:
-            key = "MultiSteamLauncher"
-            s = list(data)
-            for i, char in enumerate(s):
-                s[i] = chr(ord(char) ^ ord(key[i % len(key)]))
-            return base64.b64encode(''.join(s).encode()).decode()
+            if data.isascii():
+                # XOR with the ASCII key stays ASCII, so the UTF-8 form is the raw bytes
+                obfuscated = _xor_with_key(data.encode('ascii'), FALLBACK_KEY_ASCII)
+            else:
+                # XOR whole code points by working on their UTF-32 form
+                code_points = _xor_with_key(data.encode('utf-32-le'), FALLBACK_KEY_UTF32)
+                obfuscated = code_points.decode('utf-32-le').encode()
+            return base64.b64encode(obfuscated).decode()
         except:
             return ""
     
     def _fallback_decrypt(self, encrypted_data):
         """Fallback decryption for the simple obfuscation"""
         try:
-            key = "MultiSteamLauncher"
-            s = base64.b64decode(encrypted_data.encode()).decode()
-            result = []
-            for i, char in enumerate(s):
-                result.append(chr(ord(char) ^ ord(key[i % len(key)])))
-            return ''.join(result)
+            obfuscated = base64.b64decode(encrypted_data.encode())
+            if obfuscated.isascii():
+                return _xor_with_key(obfuscated, FALLBACK_KEY_ASCII).decode('ascii')
+            code_points = obfuscated.decode().encode('utf-32-le')
+            return _xor_with_key(code_points, FALLBACK_KEY_UTF32).decode('utf-32-le')
         except:
             return ""
+
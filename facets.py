@@ -0,0 +1,337 @@
+import collections
+import functools
+import itertools
+import operator
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Number of set bits; int.bit_count is only there from Python 3.10
+_popcount = getattr(int, "bit_count", None) or (lambda bitmap: bin(bitmap).count("1"))
+
+# Each byte of a bitmap expanded to one byte per bit, lowest bit first
+_BYTE_BITS = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+
+def _bitmap_of(slots):
+    """Bitmap with the given slots set, built in one pass instead of one OR per slot"""
+    low, high = min(slots), max(slots)
+    digits = bytearray(b"0") * (high - low + 1)
+    collections.deque(map(digits.__setitem__, [slot - low for slot in slots], itertools.repeat(ord("1"))), maxlen=0)
+    return int(digits[::-1], 2) << low
+
+
+class BitmapIndex:
+    """Objects numbered by slot, with a bitmap of slots for every facet value.
+
+    Bitmaps are Python ints, so combining values is a handful of word-wide
+    ANDs and ORs per 64 objects, and counting a combination is a popcount.
+    The number of objects per value is kept up to date as objects change.
+    Slots of removed objects are reused.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.all = 0
+        self._slots = {}
+        self._objects = []
+        self._free = []
+        self._keys = {}
+        self._bitmaps = {}
+        self._counts = {}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def objects(self):
+        return list(self._slots)
+
+    def add(self, obj, keys):
+        """Index obj under the given (facet, value) keys, replacing the ones it had"""
+        keys = frozenset(keys)
+        slot = self._slots.get(obj)
+        if slot is None:
+            slot = self._free.pop() if self._free else len(self._objects)
+            if slot == len(self._objects):
+                self._objects.append(obj)
+            else:
+                self._objects[slot] = obj
+            self._slots[obj] = slot
+            self.all |= 1 << slot
+            old = frozenset()
+        else:
+            old = self._keys[obj]
+            if old == keys:
+                return
+        self.version += 1
+        self._keys[obj] = keys
+        bit = 1 << slot
+        for key in old - keys:
+            self._unset(key, bit)
+        for key in keys - old:
+            self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+            facet, value = key
+            counts = self._counts.setdefault(facet, {})
+            counts[value] = counts.get(value, 0) + 1
+
+    update = add
+
+    def extend(self, items):
+        """Index many (obj, keys) pairs, setting the bits of new objects in bulk"""
+        added = []
+        slots_by_key = {}
+        known, objects, free, keys_of = self._slots, self._objects, self._free, self._keys
+        for obj, keys in items:
+            if obj in known:
+                self.add(obj, keys)
+                continue
+            if free:
+                slot = free.pop()
+                objects[slot] = obj
+            else:
+                slot = len(objects)
+                objects.append(obj)
+            known[obj] = slot
+            keys_of[obj] = keys = frozenset(keys)
+            added.append(slot)
+            for key in keys:
+                slots = slots_by_key.get(key)
+                if slots is None:
+                    slots_by_key[key] = [slot]
+                else:
+                    slots.append(slot)
+        if not added:
+            return
+
+        self.version += 1
+        self.all |= _bitmap_of(added)
+        for key, slots in slots_by_key.items():
+            self._bitmaps[key] = self._bitmaps.get(key, 0) | _bitmap_of(slots)
+            facet, value = key
+            counts = self._counts.setdefault(facet, {})
+            counts[value] = counts.get(value, 0) + len(slots)
+
+    def discard(self, obj):
+        slot = self._slots.pop(obj, None)
+        if slot is None:
+            return
+        self.version += 1
+        bit = 1 << slot
+        for key in self._keys.pop(obj):
+            self._unset(key, bit)
+        self.all &= ~bit
+        self._objects[slot] = None
+        self._free.append(slot)
+
+    def clear(self):
+        self.version += 1
+        self.all = 0
+        self._slots.clear()
+        self._objects.clear()
+        self._free.clear()
+        self._keys.clear()
+        self._bitmaps.clear()
+        self._counts.clear()
+
+    def bitmap(self, facet, value):
+        return self._bitmaps.get((facet, value), 0)
+
+    def counts(self, facet):
+        """Number of objects per value of the facet"""
+        return dict(self._counts.get(facet, {}))
+
+    def slot_of(self, obj):
+        return self._slots[obj]
+
+    def bits(self, bitmap):
+        """The bitmap as one byte per slot, 1 for the slots it contains"""
+        data = bitmap.to_bytes((len(self._objects) + 7) // 8, "little")
+        return b"".join(map(_BYTE_BITS.__getitem__, data))
+
+    def _unset(self, key, bit):
+        bitmap = self._bitmaps[key] & ~bit
+        if bitmap:
+            self._bitmaps[key] = bitmap
+        else:
+            del self._bitmaps[key]
+        facet, value = key
+        counts = self._counts[facet]
+        counts[value] -= 1
+        if not counts[value]:
+            del counts[value]
+
+
+class FacetSelection:
+    """Facet values to filter games by.
+
+    A game must carry every selected tag, and belong to one of the selected
+    accounts and kinds when any are selected.
+    """
+    __slots__ = ("tags", "accounts", "kinds")
+
+    def __init__(self, tags=(), accounts=(), kinds=()):
+        self.tags = frozenset(tags)
+        self.accounts = frozenset(accounts)
+        self.kinds = frozenset(kinds)
+
+    def __bool__(self):
+        return bool(self.tags or self.accounts or self.kinds)
+
+    def __len__(self):
+        return len(self.tags) + len(self.accounts) + len(self.kinds)
+
+    def values(self, facet):
+        return getattr(self, VaultFacets.FIELDS[facet])
+
+    def toggled(self, facet, value):
+        """A copy with the value added to or removed from the facet"""
+        field = VaultFacets.FIELDS[facet]
+        values = getattr(self, field)
+        changed = {name: getattr(self, name) for name in self.__slots__}
+        changed[field] = values - {value} if value in values else values | {value}
+        return FacetSelection(**changed)
+
+
+class VaultFacets(QObject):
+    """Bitmap indexes of the games of a VaultRegistry by tag, account and kind, kept current from its signals.
+
+    Like VaultSearch, create it before any model that filters with it.
+    """
+
+    TAG = "tag"
+    ACCOUNT = "account"
+    KIND = "kind"
+    FIELDS = {TAG: "tags", ACCOUNT: "accounts", KIND: "kinds"}
+
+    STEAM = "Steam"
+    NON_STEAM = "Non-Steam"
+
+    changed = pyqtSignal()
+
+    def __init__(self, registry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self.index = BitmapIndex()
+        self._aligned = None
+
+        registry.accounts_reset.connect(self.rebuild)
+        registry.accounts_inserted.connect(self.accounts_inserted)
+        registry.accounts_removed.connect(self.accounts_removed)
+        registry.games_reset.connect(self.games_reset)
+        registry.games_inserted.connect(self.games_inserted)
+        registry.games_removed.connect(self.games_removed)
+        registry.game_changed.connect(self.game_changed)
+        self.rebuild()
+
+    @classmethod
+    def kind_of(cls, game):
+        return cls.STEAM if game.is_steam_game else cls.NON_STEAM
+
+    def keys_of(self, game):
+        keys = [(self.ACCOUNT, game._owner.id), (self.KIND, self.STEAM if game.is_steam_game else self.NON_STEAM)]
+        if game.tags:
+            keys.extend([(self.TAG, tag) for tag in game.tags])
+        return keys
+
+    def rebuild(self):
+        self.index.clear()
+        self.index.extend((game, self.keys_of(game)) for _, game in self.registry.all_games())
+        self.changed.emit()
+
+    def mask(self, selection, skip=None):
+        """Bitmap of the games passing the selection, ignoring the facet `skip`"""
+        index = self.index
+        mask = index.all
+        if skip != self.TAG:
+            for tag in selection.tags:
+                mask &= index.bitmap(self.TAG, tag)
+        for facet in (self.ACCOUNT, self.KIND):
+            values = selection.values(facet)
+            if facet != skip and values:
+                mask &= functools.reduce(operator.or_, (index.bitmap(facet, value) for value in values))
+        return mask
+
+    def counts(self, selection):
+        """Per facet, the number of games each value would leave shown.
+
+        For tags, which must all match, that is the games passing the whole
+        selection that also carry the tag; for accounts and kinds, the games
+        with that value passing the selection of the other facets.
+        """
+        index = self.index
+        counts = {}
+        for facet in self.FIELDS:
+            mask = self.mask(selection, skip=None if facet == self.TAG else facet)
+            if mask == index.all:
+                counts[facet] = index.counts(facet)
+                continue
+            counts[facet] = {
+                value: _popcount(mask & index.bitmap(facet, value))
+                for value in index.counts(facet)
+            }
+        return counts
+
+    def matches(self, game, selection):
+        return (
+            selection.tags <= game.tags
+            and (not selection.accounts or game._owner.id in selection.accounts)
+            and (not selection.kinds or self.kind_of(game) in selection.kinds)
+        )
+
+    def select(self, games, selection, cancelled=None):
+        """The games of the list passing the selection, in list order"""
+        index = self.index
+        mask = self.mask(selection)
+        if mask == index.all:
+            return list(games)
+        bits = index.bits(mask)
+        if cancelled is not None and cancelled():
+            return None
+        if len(games) < 2:
+            return [game for game in games if bits[index.slot_of(game)]]
+        return list(itertools.compress(games, self._slot_getter(games)(bits)))
+
+    def _slot_getter(self, games):
+        """Picks the byte of each game of a list out of bits(), cached for the games last filtered.
+
+        The cache keeps a copy of the list, since sort orders move games
+        within their list in place; comparing the copy is a pass in C,
+        much cheaper than looking up every slot again.
+        """
+        aligned = self._aligned
+        version = self.index.version
+        if aligned is not None and aligned[1] == version and aligned[0] == games:
+            return aligned[2]
+        getter = operator.itemgetter(*map(self.index.slot_of, games))
+        self._aligned = (list(games), version, getter)
+        return getter
+
+    def accounts_inserted(self, first, last):
+        for account in self.registry.accounts[first:last + 1]:
+            self.index.extend((game, self.keys_of(game)) for game in account.games)
+        self.changed.emit()
+
+    def accounts_removed(self, first, last, accounts):
+        for account in accounts:
+            for game in account.games:
+                self.index.discard(game)
+        self.changed.emit()
+
+    def games_inserted(self, account, first, last):
+        self.index.extend((game, self.keys_of(game)) for game in account.games[first:last + 1])
+        self.changed.emit()
+
+    def games_removed(self, account, first, last, games):
+        for game in games:
+            self.index.discard(game)
+        self.changed.emit()
+
+    def games_reset(self, account):
+        for game in self.index.objects():
+            if self.registry.game(game.id) is not game:
+                self.index.discard(game)
+        self.index.extend((game, self.keys_of(game)) for game in account.games)
+        self.changed.emit()
+
+    def game_changed(self, game):
+        self.index.update(game, self.keys_of(game))
+        self.changed.emit()
@@ -1,58 +1,136 @@
 
 from PyQt5.QtWidgets import *
+import itertools
 import os
 
+from catalog import GAME_FIELDS, GameCatalog
+
+def _game_field(field):
+    def get(self):
+        overrides = self._overrides
+        if overrides and field in overrides:
+            return overrides[field]
+        return getattr(self._entry, field)
+
+    def set(self, value):
+        values = dict(zip(GAME_FIELDS, self.values()))
+        values[field] = value
+        self._bind(*values.values())
+
+    return property(get, set)
+
+
+_next_game_id = itertools.count(1)
+# Shared by every untagged game
+_NO_TAGS = frozenset()
+
+
 class Game:
-    def __init__(self, name, app_id, path, icon_path="",is_steam_game=True):
-        self.name = name
-        self.app_id = app_id
-        self.path = path
-        self.icon_path = icon_path
-        self.is_steam_game = is_steam_game
-        
-    def to_dict(self):
-        return {
-            "name": self.name,
-            "app_id": self.app_id,
-            "path": self.path,
-            "icon_path": self.icon_path,
-            "is_steam_game": self.is_steam_game
+    """A game owned by one account, backed by a shared GameCatalog entry.
+
+    Only the fields that differ from the catalog entry are stored on the game.
+    Tags belong to the game itself, so the same title can be tagged differently
+    on each account. The id is unique for the lifetime of the process.
+    """
+    __slots__ = ("id", "tags", "_entry", "_overrides", "_owner", "_revision", "_dict_cache")
+    _TRACKED_FIELDS = GAME_FIELDS + ("tags",)
+
+    name = _game_field("name")
+    app_id = _game_field("app_id")
+    path = _game_field("path")
+    icon_path = _game_field("icon_path")
+    is_steam_game = _game_field("is_steam_game")
+
+    def __init__(self, name, app_id, path, icon_path="",is_steam_game=True, tags=()):
+        self.id = next(_next_game_id)
+        self._owner = None
+        self._revision = 0
+        self._dict_cache = None
+        self._bind(name, app_id, path, icon_path, is_steam_game)
+        self.tags = tags
+
+    def _bind(self, *values):
+        """Point the game at the catalog entry for these values and keep the differences"""
+        entry = GameCatalog.shared().intern(*values)
+        overrides = {
+            field: value for field, value in zip(GAME_FIELDS, values)
+            if getattr(entry, field) != value
         }
+        super().__setattr__("_entry", entry)
+        super().__setattr__("_overrides", overrides or None)
+
+    def __setattr__(self, name, value):
+        if name == "tags":
+            value = frozenset(value) if value else _NO_TAGS
+        super().__setattr__(name, value)
+        if name in Game._TRACKED_FIELDS:
+            self.mark_dirty()
+            owner = self._owner
+            if owner is not None and owner._registry is not None:
+                owner._registry._game_changed(self)
+
+    def values(self):
+        """The game's fields in GAME_FIELDS order"""
+        return tuple(getattr(self, field) for field in GAME_FIELDS)
+
+    @property
+    def catalog_key(self):
+        return self._entry.key
+
+    def mark_dirty(self):
+        """Invalidate the cached serialized form of this game and its account"""
+        self._revision += 1
+        if self._owner is not None:
+            self._owner.mark_dirty()
+
+    def to_dict(self):
+        """Serialize as a reference to the catalog entry plus this game's own differences"""
+        revision = self._revision
+        cache = self._dict_cache
+        if cache is not None and cache[0] == revision:
+            return cache[1]
+
+        data = {"ref": self._entry.key}
+        if self._overrides:
+            data.update(self._overrides)
+        if self.tags:
+            data["tags"] = sorted(self.tags)
+        self._dict_cache = (revision, data)
+        return data
     
     @classmethod
     def from_dict(cls, data):
+        """Build a game from its catalog reference, or from the older inline format"""
+        entry = GameCatalog.shared().get(data["ref"]) if "ref" in data else None
+        if entry is not None:
+            data = {**entry.to_dict(), **data}
+        elif "ref" in data and "name" not in data:
+            # The entry is missing from the config; rebuild what the key tells
+            # rather than fail to load the whole vault
+            print(f"Missing catalog entry for {data['ref']}")
+            kind, _, value = data["ref"].partition(":")
+            if kind == "app":
+                fallback = {"name": f"App {value}", "app_id": value, "path": "", "is_steam_game": True}
+            else:
+                fallback = {"name": os.path.basename(value) or value, "app_id": "", "path": value, "is_steam_game": False}
+            data = {**fallback, **data}
+
         return cls(
             data["name"], 
             data["app_id"], 
             data["path"], 
             data.get("icon_path", ""),
-            data.get("is_steam_game", True)
+            data.get("is_steam_game", True),
+            data.get("tags", ())
         )
 
 
 class GameDialog(QDialog):
-    def __init__(self, accounts, parent=None, edit_mode=False, current_account_index=0, current_game=None):
+    def __init__(self, accounts, parent=None, edit_mode=False, current_account_id=None, current_game=None):
         super().__init__(parent)
         self.setWindowTitle("Add Game" if not edit_mode else "Edit Game")
         self.setMinimumWidth(500)
         
-        # Modern styling
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #1a2634;
-            }
-            QLabel {
-                color: #ecf0f1;
-            }
-            QLineEdit {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                padding: 5px;
-            }
-        """)
-        
         self.accounts = accounts
         self.edit_mode = edit_mode
         
@@ -61,7 +139,7 @@ class GameDialog(QDialog):
         self.name_edit = QLineEdit()
         self.name_edit.setPlaceholderText("Game name")
         self.name_validation = QLabel()
-        self.name_validation.setStyleSheet("color: red")
+        self.name_validation.setProperty("validation", True)
         
         self.steam_game_check = QCheckBox("Steam Game")
         self.steam_game_check.setChecked(True)
@@ -70,35 +148,23 @@ class GameDialog(QDialog):
         self.app_id_edit = QLineEdit()
         self.app_id_edit.setPlaceholderText("Steam App ID (can be found on Steam store page)")
         self.app_id_validation = QLabel()
-        self.app_id_validation.setStyleSheet("color: red")
+        self.app_id_validation.setProperty("validation", True)
         
         self.path_edit = QLineEdit()
         self.path_edit.setPlaceholderText("Path to game executable")
         self.path_validation = QLabel()
-        self.path_validation.setStyleSheet("color: red")
+        self.path_validation.setProperty("validation", True)
         
         self.browse_button = QPushButton("Browse...")
         self.browse_button.clicked.connect(self.browse_for_game)
         
+        self.tags_edit = QLineEdit()
+        self.tags_edit.setPlaceholderText("Comma-separated, e.g. installed, multiplayer")
+
         self.account_combo = QComboBox()
-        self.account_combo.setStyleSheet("""
-            QComboBox {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            border: 1px solid #34495e;
-            border-radius: 4px;
-            padding: 5px;
-            }
-            QComboBox QAbstractItemView {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            selection-background-color: #3498db;
-            selection-color: white;
-            }
-        """)
 
         for account in self.accounts:
-            self.account_combo.addItem(account.name)
+            self.account_combo.addItem(account.name, account.id)
         
         path_layout = QHBoxLayout()
         path_layout.addWidget(self.path_edit)
@@ -111,6 +177,7 @@ class GameDialog(QDialog):
         self.layout.addRow("", self.app_id_validation)
         self.layout.addRow("Executable Path:", path_layout)
         self.layout.addRow("", self.path_validation)
+        self.layout.addRow("Tags:", self.tags_edit)
         self.layout.addRow("Steam Account:", self.account_combo)
         
         self.buttons_layout = QHBoxLayout()
@@ -130,8 +197,9 @@ class GameDialog(QDialog):
             self.name_edit.setText(current_game.name)
             self.app_id_edit.setText(current_game.app_id)
             self.path_edit.setText(current_game.path)
-            self.account_combo.setCurrentIndex(current_account_index)
+            self.account_combo.setCurrentIndex(max(self.account_combo.findData(current_account_id), 0))
             self.steam_game_check.setChecked(current_game.is_steam_game)
+            self.tags_edit.setText(", ".join(sorted(current_game.tags)))
         
         self.name_edit.textChanged.connect(self.validate_name)
         self.app_id_edit.textChanged.connect(self.validate_app_id)
@@ -278,6 +346,7 @@ class GameDialog(QDialog):
             "name": self.name_edit.text().strip(),
             "app_id": self.app_id_edit.text().strip() if self.steam_game_check.isChecked() else "",
             "path": self.path_edit.text().strip(),
-            "account_index": self.account_combo.currentIndex() if self.steam_game_check.isChecked() else -1,
-            "is_steam_game": self.steam_game_check.isChecked()
+            "account_id": self.account_combo.currentData() if self.steam_game_check.isChecked() else None,
+            "is_steam_game": self.steam_game_check.isChecked(),
+            "tags": [tag.strip() for tag in self.tags_edit.text().split(",") if tag.strip()]
         }
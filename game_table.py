@@ -0,0 +1,95 @@
+import sys
+
+from catalog import GAME_FIELDS
+from game import Game
+
+
+def _row_field(field):
+    def get(self):
+        return self._table.get(self._index, field)
+
+    def set(self, value):
+        self._table.set(self._index, field, value)
+
+    return property(get, set)
+
+
+class GameRow:
+    """View of one row of a GameTable with the same attributes as Game"""
+    __slots__ = ("_table", "_index")
+
+    name = _row_field("name")
+    app_id = _row_field("app_id")
+    path = _row_field("path")
+    icon_path = _row_field("icon_path")
+    is_steam_game = _row_field("is_steam_game")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def values(self):
+        """The row's fields in GAME_FIELDS order"""
+        return tuple(self._table.get(self._index, field) for field in GAME_FIELDS)
+
+    def to_game(self):
+        return Game(*self.values())
+
+    def to_dict(self):
+        return dict(zip(GAME_FIELDS, self.values()))
+
+
+class GameTable:
+    """Games stored column by column in parallel lists of interned strings.
+
+    A row costs one pointer per field instead of a Python object, which makes
+    this the compact choice for large read-mostly game lists. Rows are read
+    and written through GameRow views that behave like Game objects.
+    """
+
+    def __init__(self, games=()):
+        self._columns = {field: [] for field in GAME_FIELDS}
+        self._columns["is_steam_game"] = bytearray()
+        for game in games:
+            self.append(*(getattr(game, field) for field in GAME_FIELDS))
+
+    def __len__(self):
+        return len(self._columns["name"])
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("GameTable index out of range")
+        return GameRow(self, index)
+
+    def __iter__(self):
+        return (GameRow(self, index) for index in range(len(self)))
+
+    def append(self, name, app_id, path, icon_path="", is_steam_game=True):
+        """Add a game and return its row"""
+        columns = self._columns
+        columns["name"].append(sys.intern(name))
+        columns["app_id"].append(sys.intern(app_id))
+        columns["path"].append(sys.intern(path))
+        columns["icon_path"].append(sys.intern(icon_path))
+        columns["is_steam_game"].append(bool(is_steam_game))
+        return GameRow(self, len(self) - 1)
+
+    def get(self, index, field):
+        value = self._columns[field][index]
+        return bool(value) if field == "is_steam_game" else value
+
+    def set(self, index, field, value):
+        if field == "is_steam_game":
+            value = bool(value)
+        else:
+            value = sys.intern(value)
+        self._columns[field][index] = value
+
+    def column(self, field):
+        """Read-only access to a whole column, for scans that do not need rows"""
+        return self._columns[field]
+
+    def to_games(self):
+        return [row.to_game() for row in self]
@@ -0,0 +1,184 @@
+import os
+import re
+import sys
+import threading
+import time
+
+import psutil
+
+from process_monitor import ProcessMonitor
+from steam_state import SteamState, find_steam_dir
+
+# Environment variable naming the instance a process belongs to, set in every process it starts
+INSTANCE_VARIABLE = "MSL_STEAM_INSTANCE"
+
+
+def instance_slot(username):
+    """Name of the directory that holds the account's instance"""
+    return re.sub(r"[^\w.-]", "_", username.casefold())
+
+
+def supported():
+    """Whether Steam can be run in separate home directories here"""
+    return sys.platform.startswith("linux")
+
+
+class SteamInstance:
+    """One account's Steam client, run with a home directory of its own.
+
+    Steam keeps its data under $XDG_DATA_HOME/Steam and its single-instance
+    lock, pid file and command pipe under ~/.steam, so a client started with
+    HOME and the XDG directories moved elsewhere neither sees nor forwards to
+    a client running for another account. The pid of the client started for
+    the account is tracked; after a restart of the launcher it is read back
+    from the instance's registry.vdf and checked against the instance named
+    in the process environment.
+    """
+
+    def __init__(self, root, username):
+        self.username = username
+        self.slot = instance_slot(username)
+        self.home = os.path.join(root, self.slot)
+        self.steam_dir = os.path.join(self.home, ".local", "share", "Steam")
+        self.state = SteamState("", self.steam_dir, home=self.home)
+        self.pid = None
+        self.last_used = 0.0
+        self.busy = False
+
+    def environment(self):
+        """Environment for the processes of this instance"""
+        env = dict(os.environ)
+        env.update({
+            "HOME": self.home,
+            "XDG_CONFIG_HOME": os.path.join(self.home, ".config"),
+            "XDG_DATA_HOME": os.path.join(self.home, ".local", "share"),
+            "XDG_CACHE_HOME": os.path.join(self.home, ".cache"),
+            "XDG_STATE_HOME": os.path.join(self.home, ".local", "state"),
+            INSTANCE_VARIABLE: self.slot,
+        })
+        return env
+
+    def prepare(self, library_dir=None):
+        """Create the home directory, sharing the installed games in library_dir"""
+        for path in (".config", ".cache", os.path.join(".local", "state"), ".steam"):
+            os.makedirs(os.path.join(self.home, path), exist_ok=True)
+        os.makedirs(os.path.join(self.steam_dir, "config"), exist_ok=True)
+        os.makedirs(os.path.join(self.steam_dir, "logs"), exist_ok=True)
+
+        # Games are installed once and shared, rather than downloaded for every account
+        steamapps = os.path.join(self.steam_dir, "steamapps")
+        shared = os.path.join(library_dir, "steamapps") if library_dir else None
+        if shared and os.path.isdir(shared) and not os.path.lexists(steamapps):
+            try:
+                os.symlink(shared, steamapps)
+            except OSError as e:
+                print(f"Cannot share the Steam library with {self.username}: {e}")
+
+    def started(self, pid):
+        self.pid = pid
+        self.last_used = time.time()
+
+    def client(self):
+        """The Steam process started for this instance, or None if it is not running"""
+        if self.pid is None:
+            pid = self.state.active_process().get("pid")
+            if pid is None or not pid.isdigit():
+                return None
+            self.pid = int(pid)
+        try:
+            process = psutil.Process(self.pid)
+            if process.status() != psutil.STATUS_ZOMBIE and process.environ().get(INSTANCE_VARIABLE) == self.slot:
+                return process
+        except psutil.Error:
+            pass
+        self.pid = None
+        return None
+
+    def processes(self):
+        """The client and every process it started"""
+        process = self.client()
+        if process is None:
+            return []
+        try:
+            return [process] + process.children(recursive=True)
+        except psutil.Error:
+            return [process]
+
+    def running(self):
+        return self.client() is not None
+
+
+class InstancePool:
+    """Isolated Steam instances under one root directory, one per account.
+
+    At most `size` instances run at once; an account that needs one when
+    the pool is full takes the place of the instance used least recently
+    that is not busy launching.
+    """
+
+    def __init__(self, root, size):
+        self.root = root
+        self.size = size
+        self.monitor = ProcessMonitor.shared()
+        self._lock = threading.Lock()
+        # Instances left running by an earlier session are found by their directories
+        self._instances = {}
+        if os.path.isdir(root):
+            for slot in os.listdir(root):
+                if os.path.isdir(os.path.join(root, slot)):
+                    self._instances[slot] = SteamInstance(root, slot)
+
+    def acquire(self, username, steam_path=None, timeout=10.0):
+        """The account's instance, ready to start and marked busy until `release`.
+
+        The instance shares the installed games of the Steam client at steam_path.
+        """
+        with self._lock:
+            slot = instance_slot(username)
+            instance = self._instances.get(slot)
+            if instance is None:
+                instance = self._instances[slot] = SteamInstance(self.root, username)
+            instance.username = username
+            instance.busy = True
+            instance.last_used = time.time()
+            evicted = self._evict(instance)
+            if evicted is not None:
+                # So a launch on another thread does not pick it too
+                evicted.busy = True
+
+        try:
+            if evicted is not None:
+                print(f"Stopping the Steam instance of {evicted.username} to make room for {username}")
+                try:
+                    self.monitor.terminate(evicted.processes(), timeout)
+                finally:
+                    self.release(evicted)
+            instance.prepare(find_steam_dir(steam_path) if steam_path else None)
+        except Exception:
+            self.release(instance)
+            raise
+        return instance
+
+    def release(self, instance):
+        with self._lock:
+            instance.busy = False
+
+    def _evict(self, instance):
+        running = [other for other in self._instances.values() if other is not instance and other.running()]
+        if instance.running() or len(running) < self.size:
+            return None
+        idle = [other for other in running if not other.busy]
+        return min(idle, key=lambda other: other.last_used) if idle else None
+
+    def instances(self):
+        """Running instances, by account name"""
+        with self._lock:
+            instances = list(self._instances.values())
+        return {instance.username: instance for instance in instances if instance.running()}
+
+    def stop_all(self, timeout=10.0):
+        """Stop every instance; return the processes that survived"""
+        processes = []
+        for instance in self.instances().values():
+            processes += instance.processes()
+        return self.monitor.terminate(processes, timeout)
@@ -1,15 +1,27 @@
-import winreg
+try:
+    import winreg
+except ImportError:  # Not on Windows; startup integration is unavailable
+    winreg = None
 import os
 import subprocess
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtCore import *
 
+from config import STEAM_APPLAUNCH_TIMEOUT, STEAM_LOGIN_TIMEOUT, STEAM_SHUTDOWN_TIMEOUT
 from encryption import EncryptionHandler
+from process_monitor import ProcessMonitor
+from steam_state import SteamState, wait_until
 
 class StartupManager:
     @staticmethod
     def is_startup_enabled():
         """Check if the application is set to run at startup."""
+        if winreg is None:
+            return False
         try:
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER, 
@@ -60,99 +72,289 @@ class StartupManager:
             print(f"Error disabling startup: {e}")
             return False
 
-class SteamLoginThread(QThread):
-    login_finished = pyqtSignal(bool)
-    login_progress = pyqtSignal(str)
-    
-    def __init__(self, steam_path, username, password=None):
-        super().__init__()
+class SteamLogin:
+    """Restarts Steam signed in as the given account.
+
+    Rather than sleeping for fixed times, it waits for the old Steam processes
+    to exit, then for a new one to start and for Steam's own state files to
+    record the sign-in, each up to a timeout. Progress messages go to
+    `progress`, and the wait for the sign-in stops early once `cancelled()`
+    returns true. Given an isolated `instance`, only that instance's client
+    is restarted and every other Steam client keeps running.
+    """
+
+    def __init__(self, steam_path, username, password=None, steam_dir=None,
+                 shutdown_timeout=STEAM_SHUTDOWN_TIMEOUT, login_timeout=STEAM_LOGIN_TIMEOUT,
+                 progress=None, cancelled=None, instance=None):
         self.steam_path = steam_path
         self.username = username
         self.password = password
-        
+        self.instance = instance
+        self.state = instance.state if instance is not None else SteamState(steam_path, steam_dir)
+        self.monitor = ProcessMonitor.shared()
+        self.shutdown_timeout = shutdown_timeout
+        self.login_timeout = login_timeout
+        self.progress = progress or (lambda message: None)
+        self.cancelled = cancelled
+
     def run(self):
-        self.login_progress.emit("Closing any running Steam instances...")
-        try:
-            if os.name == 'nt':  # Windows
-                subprocess.call("taskkill /F /IM steam.exe", shell=True)
-            else:  # Linux/Mac
-                subprocess.call("pkill -f steam", shell=True)
-        except:
-            pass
-        
-        time.sleep(1)
+        """Sign Steam in as the account; return whether a Steam client is running afterwards"""
+        if self.instance is None:
+            self.progress("Closing any running Steam instances...")
+            survivors = self.monitor.terminate_steam(self.shutdown_timeout)
+        else:
+            self.progress(f"Closing the Steam instance of {self.username}...")
+            survivors = self.monitor.terminate(self.instance.processes(), self.shutdown_timeout)
+        if survivors:
+            self.progress("Steam is still closing, launching anyway...")
         
-        self.login_progress.emit("Launching Steam with account credentials...")
+        started = time.time()
+        log_offset = self.state.log_offset()
+        self.progress("Launching Steam with account credentials...")
         
         if self.password:
             self.create_auto_login_file(self.username, self.password)
-            cmd = f'"{self.steam_path}" -login {self.username} {self.password}'
+            arguments = ["-login", self.username, self.password]
         else:
-            cmd = f'"{self.steam_path}" -login {self.username}'
-            
-        proc = subprocess.Popen(cmd, shell=True)
-        
-        for i in range(5):
-            self.login_progress.emit(f"Logging in... ({i+1}/5)")
-            time.sleep(1)
+            arguments = ["-login", self.username]
             
-        self.login_progress.emit("Verifying login...")
-        success = self.is_steam_running()
+        if self.instance is None:
+            proc = subprocess.Popen(f'"{self.steam_path}" ' + " ".join(arguments), shell=True)
+        else:
+            # Started without a shell, so the pid is the client's own
+            proc = subprocess.Popen([self.steam_path] + arguments, env=self.instance.environment())
+            self.instance.started(proc.pid)
         
-        self.login_finished.emit(success)
+        signed_in = wait_until(
+            lambda: self.is_signed_in(started, log_offset),
+            self.login_timeout,
+            cancelled=self.cancelled,
+            on_wait=lambda elapsed: self.progress(f"Logging in... ({elapsed:.0f} s)"),
+        )
+        if signed_in:
+            return True
+        # Steam may be waiting for a password or Steam Guard code
+        self.progress("Could not confirm the login, continuing...")
+        return self.is_steam_running()
+    
+    def is_signed_in(self, started, log_offset):
+        """Whether a Steam client started since `started` has signed in as the account"""
+        if self.instance is not None:
+            # The instance's client was started by run(), so any running one is new
+            if not self.instance.running():
+                return False
+        elif not self.monitor.steam_started_since(started):
+            return False
+        return self.state.signed_in_since(self.username, started) or self.state.logged_on_since(log_offset)
+
+    def already_signed_in(self):
+        """Whether the running Steam client is already signed in as the account"""
+        if self.instance is not None:
+            processes = self.instance.processes()
+        else:
+            processes = self.monitor.steam_processes(fresh=True)
+        account = self.state.signed_in_account(processes)
+        return account is not None and account.casefold() == self.username.casefold()
     
     def create_auto_login_file(self, username, password):
-        self.login_progress.emit("Creating auto-login file...")
+        self.progress("Creating auto-login file...")
         enc = EncryptionHandler()
         encrypted_username = enc.encrypt(username)
         encrypted_password = enc.encrypt(password)
 
-        auto_login_path = os.path.join(os.getenv('TEMP'), 'steam_auto_login.enc')
+        auto_login_path = os.path.join(tempfile.gettempdir(), 'steam_auto_login.enc')
         try:
             with open(auto_login_path, 'w') as f:
                 f.write(f"{encrypted_username}\n{encrypted_password}\n")
-            self.login_progress.emit(f"Auto-login credentials securely stored at {auto_login_path}")
+            self.progress(f"Auto-login credentials securely stored at {auto_login_path}")
         except Exception as e:
-            self.login_progress.emit(f"Failed to store auto-login credentials: {e}")
+            self.progress(f"Failed to store auto-login credentials: {e}")
 
-    
     def is_steam_running(self):
-        try:
-            if os.name == 'nt':  # Windows
-                output = subprocess.check_output("tasklist | findstr steam.exe", shell=True)
-                return b"steam.exe" in output
-            else:  # Linux/Mac
-                output = subprocess.check_output("ps aux | grep -v grep | grep steam", shell=True)
-                return len(output) > 0
-        except:
-            return False
+        if self.instance is not None:
+            return self.instance.running()
+        return self.monitor.steam_running(fresh=True)
 
-class LaunchThread(QThread):
-    launch_finished = pyqtSignal(bool)
-    launch_progress = pyqtSignal(str)
-    
-    def __init__(self, steam_path, username, password=None, app_id=None):
-        super().__init__()
+
+class LaunchRequest:
+    """The games queued for one account, in the order they were asked for"""
+
+    def __init__(self, steam_path, username, password=None):
         self.steam_path = steam_path
         self.username = username
         self.password = password
-        self.app_id = app_id
-        
+        self.app_ids = []
+        self.cancelled = False
+
+    def is_for(self, username):
+        return self.username.casefold() == username.casefold()
+
+
+class LaunchScheduler(QThread):
+    """Launches games one account at a time on a single long-lived worker thread.
+
+    Steam is signed in as one account at a time, so requests are served in
+    the order they were made and each account switch completes before the
+    next begins. A request for an account that is already queued joins that
+    account's batch instead of queueing another login, and a game already in
+    the batch is not queued twice, so the games queued for an account are
+    launched one after another under a single login. Games asked for while
+    their account is signing in join the login under way.
+
+    Given a pool of isolated instances, each account runs its own Steam
+    client and up to `pool.size` accounts are signed in and launched at the
+    same time, each on a thread of a small executor.
+    """
+    launch_progress = pyqtSignal(str)
+    launch_finished = pyqtSignal(str, bool)  # username, success
+    queue_changed = pyqtSignal(int)  # accounts waiting or being launched
+
+    def __init__(self, steam_dir=None, shutdown_timeout=STEAM_SHUTDOWN_TIMEOUT,
+                 login_timeout=STEAM_LOGIN_TIMEOUT, applaunch_timeout=STEAM_APPLAUNCH_TIMEOUT,
+                 pool=None, parent=None):
+        super().__init__(parent)
+        self.steam_dir = steam_dir
+        self.pool = pool
+        self.workers = pool.size if pool is not None else 1
+        self.shutdown_timeout = shutdown_timeout
+        self.login_timeout = login_timeout
+        self.applaunch_timeout = applaunch_timeout
+
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._active = []
+        self._running = True
+
+    def submit(self, steam_path, username, password=None, app_id=None):
+        """Queue a launch of app_id, or only a login, on the account; return False if it is already queued"""
+        with self._condition:
+            request = self._find(username)
+            if request is None:
+                request = LaunchRequest(steam_path, username, password)
+                self._queue.append(request)
+            elif app_id is None or app_id in request.app_ids:
+                return False
+            else:
+                request.steam_path = steam_path
+                request.password = password or request.password
+            if app_id is not None:
+                request.app_ids.append(app_id)
+            pending = self._pending()
+            self._condition.notify_all()
+        self.queue_changed.emit(pending)
+        return True
+
+    def cancel(self, username=None):
+        """Drop the queued launches for the account, or for every account, and stop a login under way"""
+        with self._condition:
+            for request in (*self._active, *self._queue):
+                if username is None or request.is_for(username):
+                    request.cancelled = True
+            self._queue = deque(request for request in self._queue if not request.cancelled)
+            pending = self._pending()
+            self._condition.notify_all()
+        self.queue_changed.emit(pending)
+
+    def pending(self):
+        """Number of accounts waiting or being launched"""
+        with self._condition:
+            return self._pending()
+
+    def stop(self):
+        """Cancel every launch and stop the worker"""
+        self.cancel()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.wait()
+
     def run(self):
-        self.login_thread = SteamLoginThread(self.steam_path, self.username, self.password)
-        self.login_thread.login_progress.connect(self.relay_progress)
-        self.login_thread.start()
-        self.login_thread.wait()
+        executor = ThreadPoolExecutor(self.workers, thread_name_prefix="msl-launch") if self.pool is not None else None
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (self._queue and len(self._active) < self.workers) or not self._running)
+                if not self._running:
+                    break
+                request = self._queue.popleft()
+                self._active.append(request)
+
+            if executor is None:
+                self._serve(request)
+            else:
+                executor.submit(self._serve, request)
+        if executor is not None:
+            executor.shutdown()
+
+    def _serve(self, request):
+        instance = None
+        try:
+            if self.pool is not None:
+                instance = self.pool.acquire(request.username, request.steam_path, self.shutdown_timeout)
+            success = self._launch(request, instance)
+        except Exception as e:
+            print(f"Error launching on {request.username}: {e}")
+            success = False
+            with self._condition:
+                if request in self._active:
+                    self._active.remove(request)
+        finally:
+            if instance is not None:
+                self.pool.release(instance)
+
+        with self._condition:
+            pending = self._pending()
+            self._condition.notify_all()
+        self.launch_finished.emit(request.username, success)
+        self.queue_changed.emit(pending)
+
+    def _pending(self):
+        return len(self._queue) + len(self._active)
+
+    def _find(self, username):
+        # An account being launched still takes games until its batch is done
+        for request in (*self._active, *self._queue):
+            if not request.cancelled and request.is_for(username):
+                return request
+        return None
+
+    def _launch(self, request, instance=None):
+        login = SteamLogin(
+            request.steam_path, request.username, request.password, self.steam_dir,
+            self.shutdown_timeout, self.login_timeout,
+            progress=self.launch_progress.emit,
+            cancelled=lambda: request.cancelled,
+            instance=instance,
+        )
+        if login.already_signed_in():
+            # Launching another game on the same account needs no new login
+            self.launch_progress.emit(f"Steam is already signed in as {request.username}")
+            success = True
+        else:
+            success = login.run()
+
+        while True:
+            with self._condition:
+                if request.cancelled or not request.app_ids:
+                    self._active.remove(request)
+                    break
+                app_id = request.app_ids.pop(0)
+            self.launch_app(request.steam_path, app_id, instance)
+
+        if request.cancelled:
+            self.launch_progress.emit(f"Launch on {request.username} cancelled")
+            return False
+        return success
+
+    def launch_app(self, steam_path, app_id, instance=None):
+        self.launch_progress.emit(f"Launching game (App ID: {app_id})...")
         
-        if self.app_id:
-            self.launch_progress.emit(f"Launching game (App ID: {self.app_id})...")
-            
-            cmd = f'"{self.steam_path}" -applaunch {self.app_id}'
-            subprocess.Popen(cmd, shell=True)
-            
-            time.sleep(2)
-            
-        self.launch_finished.emit(True)
-    
-    def relay_progress(self, msg):
-        self.launch_progress.emit(msg)
+        cmd = f'"{steam_path}" -applaunch {app_id}'
+        # In an instance's environment the command reaches that instance's client
+        proc = subprocess.Popen(cmd, shell=True, env=instance.environment() if instance is not None else None)
+        
+        # A running client hands the launch over and the command exits
+        try:
+            proc.wait(self.applaunch_timeout)
+        except subprocess.TimeoutExpired:
+            pass
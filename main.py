@@ -4,58 +4,47 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import sys
 import os
-import json
 import subprocess
 
 from account import SteamAccount, AddAccountDialog
-from launcher import StartupManager, LaunchThread
+from launcher import StartupManager, LaunchScheduler
+import instances
 from game import Game, GameDialog
-from ui import ModernStyledButton, ModernStyledListWidget
+from registry import VaultRegistry
+from search import LiveFilter, VaultSearch
+from facets import FacetSelection, VaultFacets
+from palette import CommandPalette, PaletteAction, PaletteIndex
+from ui import ModernStyledButton, ModernStyledListView, apply_theme
+from models import AccountListModel, GameListModel
 from encryption import EncryptionHandler
-from config import CONFIG_PATH, ENCRYPTION_KEY_PATH
+from storage import ConfigWriter, JournalStore
+from sqlite_store import SqliteStore
+from config import CONFIG_PATH, ENCRYPTION_KEY_PATH, DATABASE_PATH, STORAGE_BACKEND
+from config import STEAM_INSTANCE_ROOT, STEAM_MAX_INSTANCES, STEAM_MULTI_INSTANCE
 
 class MultiSteamLauncher(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowIcon(QIcon("icon.png")) 
 
-        self.accounts = []
+        self.registry = VaultRegistry()
+        # Created before the list models so they see every edit before the models do
+        self.search = VaultSearch(self.registry)
+        self.facets = VaultFacets(self.registry, self)
+        self.game_facets = FacetSelection()
         self.steam_path = ""
         self.encryption_handler = EncryptionHandler()
-        
-        # Add modern styling to the main window
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #1a2634;
-            }
-            QLabel {
-                color: #ecf0f1;
-            }
-            QLineEdit {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QComboBox {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QComboBox::drop-down {
-                subcontrol-origin: padding;
-                subcontrol-position: top right;
-                width: 20px;
-                border-left-width: 1px;
-                border-left-color: #34495e;
-                border-left-style: solid;
-            }
-        """)
+
+        # Config writes happen on a worker thread so edits never block the UI
+        self.store = self.create_store()
+        self.config_writer = ConfigWriter(self.store, parent=self)
+        self.config_writer.save_finished.connect(self.config_saved)
+        self.config_writer.save_failed.connect(self.config_save_failed)
+        self.config_writer.start()
         
         self.init_ui()
+        self.init_launcher()
+        self.init_palette()
         self.load_config()
     
     def init_ui(self):
@@ -79,9 +68,13 @@ class MultiSteamLauncher(QMainWindow):
         account_search_layout.addWidget(self.account_search_edit)
         
         # Account list with sorting
-        self.account_list = ModernStyledListWidget()
+        self.account_model = AccountListModel(self.registry, self)
+        # Typing is debounced and matched off the UI thread
+        self.account_filter = LiveFilter(self.account_model, self.account_filter_for, self)
+        self.account_list = ModernStyledListView()
+        self.account_list.setModel(self.account_model)
         self.account_list.setIconSize(QSize(32, 32))
-        self.account_list.currentRowChanged.connect(self.account_selected)
+        self.account_list.selectionModel().currentRowChanged.connect(self.account_selected)
         self.account_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.account_list.customContextMenuRequested.connect(self.show_account_context_menu)
         
@@ -90,21 +83,6 @@ class MultiSteamLauncher(QMainWindow):
         account_sort_label = QLabel("Sort by:")
         self.account_sort_combo = QComboBox()
         self.account_sort_combo.addItems(["Name", "Username", "Number of Games"])
-        self.account_sort_combo.setStyleSheet("""
-            QComboBox {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            border: 1px solid #34495e;
-            border-radius: 4px;
-            padding: 5px;
-            }
-            QComboBox QAbstractItemView {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            selection-background-color: #3498db;
-            selection-color: white;
-            }
-        """)
         self.account_sort_combo.currentIndexChanged.connect(self.sort_accounts)
         account_sort_layout.addWidget(account_sort_label)
         account_sort_layout.addWidget(self.account_sort_combo)
@@ -144,11 +122,25 @@ class MultiSteamLauncher(QMainWindow):
         self.game_search_edit.textChanged.connect(self.filter_games)
         game_search_layout.addWidget(game_search_label)
         game_search_layout.addWidget(self.game_search_edit)
+
+        # Tag, account and Steam/non-Steam filters, with the number of games each would show
+        self.facet_menu = QMenu(self)
+        self.facet_menu.aboutToShow.connect(self.update_facet_menu)
+        self.facet_menu.triggered.connect(self.toggle_facet)
+        self.facets.changed.connect(self.facets_changed)
+        self.facet_button = QToolButton()
+        self.facet_button.setText("Filters")
+        self.facet_button.setMenu(self.facet_menu)
+        self.facet_button.setPopupMode(QToolButton.InstantPopup)
+        game_search_layout.addWidget(self.facet_button)
         
         # Game list with sorting
-        self.game_list = ModernStyledListWidget()
+        self.game_model = GameListModel(self.registry, self)
+        self.game_filter = LiveFilter(self.game_model, self.game_filter_for, self)
+        self.game_list = ModernStyledListView()
+        self.game_list.setModel(self.game_model)
         self.game_list.setIconSize(QSize(64, 64))
-        self.game_list.itemDoubleClicked.connect(self.launch_game)
+        self.game_list.doubleClicked.connect(self.launch_game)
         self.game_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.game_list.customContextMenuRequested.connect(self.show_game_context_menu)
         
@@ -157,21 +149,6 @@ class MultiSteamLauncher(QMainWindow):
         game_sort_label = QLabel("Sort by:")
         self.game_sort_combo = QComboBox()
         self.game_sort_combo.addItems(["Name", "App ID", "Account"])
-        self.game_sort_combo.setStyleSheet("""
-            QComboBox {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            border: 1px solid #34495e;
-            border-radius: 4px;
-            padding: 5px;
-            }
-            QComboBox QAbstractItemView {
-            background-color: #2c3e50;
-            color: #ecf0f1;
-            selection-background-color: #3498db;
-            selection-color: white;
-            }
-        """)
         self.game_sort_combo.currentIndexChanged.connect(self.sort_games)
         game_sort_layout.addWidget(game_sort_label)
         game_sort_layout.addWidget(self.game_sort_combo)
@@ -240,23 +217,7 @@ class MultiSteamLauncher(QMainWindow):
         # Add Startup Preference to Right Content Layout
         startup_layout = QHBoxLayout()
         self.startup_checkbox = QCheckBox("Launch at Windows Startup")
-        self.startup_checkbox.setStyleSheet("""
-            QCheckBox {
-                color: #ecf0f1;
-                spacing: 10px;
-            }
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                background-color: #2c3e50;
-            }
-            QCheckBox::indicator:checked {
-                background-color: #3498db;
-                image: url(:/checkbox-checked.png);
-            }
-        """)
+        self.startup_checkbox.setObjectName("startupCheckbox")
         
         # Set initial startup checkbox state
         self.startup_checkbox.setChecked(StartupManager.is_startup_enabled())
@@ -267,6 +228,104 @@ class MultiSteamLauncher(QMainWindow):
         startup_layout.addWidget(self.startup_checkbox)
         right_layout.addLayout(startup_layout)
         
+    def init_palette(self):
+        """Ctrl+K opens a palette to launch a game, switch account or run a command by typing"""
+        actions = [
+            PaletteAction("Add Account", self.add_account),
+            PaletteAction("Add Game", self.add_game),
+            PaletteAction("Show All Games", self.show_all_games),
+            PaletteAction("Set Steam Path", self.set_steam_path),
+        ]
+        if self.instance_pool is not None:
+            actions.append(PaletteAction("Stop Steam Instances", self.stop_instances))
+        self.palette_index = PaletteIndex(self.registry, actions=actions)
+        self.command_palette = CommandPalette(self.palette_index, self.palette_activate, self)
+        QShortcut(QKeySequence("Ctrl+K"), self, self.command_palette.open_palette)
+
+    def init_launcher(self):
+        """One worker launches every Steam game, queueing launches and switching accounts one at a time"""
+        # In multi-instance mode each account keeps its own Steam client and launches run side by side
+        self.instance_pool = None
+        if STEAM_MULTI_INSTANCE:
+            if instances.supported():
+                self.instance_pool = instances.InstancePool(STEAM_INSTANCE_ROOT, STEAM_MAX_INSTANCES)
+            else:
+                print("Multi-instance mode needs Linux; launching one account at a time")
+        self.launch_scheduler = LaunchScheduler(pool=self.instance_pool, parent=self)
+        self.launch_dialog = QProgressDialog("Launching game...", "Cancel", 0, 0, self)
+        self.launch_dialog.setWindowTitle("Launching games")
+        self.launch_dialog.setMinimumDuration(500)
+        # Not modal, so more games can be queued while one launches
+        self.launch_dialog.setWindowModality(Qt.NonModal)
+        self.launch_dialog.reset()
+        self.launch_dialog.canceled.connect(self.launch_scheduler.cancel)
+        self.launch_scheduler.launch_progress.connect(self.launch_dialog.setLabelText)
+        self.launch_scheduler.launch_finished.connect(self.launch_finished)
+        self.launch_scheduler.queue_changed.connect(self.launch_queue_changed)
+        self.launch_scheduler.start()
+
+    def launch_finished(self, username, success):
+        if not success:
+            self.show_status(f"Launch on {username} did not complete", 3000)
+
+    def stop_instances(self):
+        survivors = self.instance_pool.stop_all()
+        if survivors:
+            self.show_status(f"{len(survivors)} Steam processes did not stop", 3000)
+        else:
+            self.show_status("Steam instances stopped", 3000)
+
+    def launch_queue_changed(self, pending):
+        if pending == 0:
+            self.launch_dialog.reset()
+        elif pending == 1:
+            self.launch_dialog.setWindowTitle("Launching games")
+        else:
+            self.launch_dialog.setWindowTitle(f"Launching games ({pending - 1} more queued)")
+
+    def palette_activate(self, target, edit):
+        """Run the command for a palette result: edit it if asked, otherwise launch, switch to or run it"""
+        if isinstance(target, PaletteAction):
+            target.callback()
+            return
+        if isinstance(target, SteamAccount):
+            self.show_account(target)
+            if edit:
+                self.edit_account()
+            return
+
+        account = self.registry.account_of(target)
+        if account is None:
+            return
+        if not edit:
+            self.launch(account, target)
+            return
+        self.show_account(account)
+        if self.game_model.row_of(target) < 0:
+            # Hidden by the game filters
+            self.game_search_edit.clear()
+            self.game_facets = FacetSelection()
+            self.facet_button.setText("Filters")
+            self.game_filter.run()
+        self.select_row(self.game_list, self.game_model, target)
+        self.edit_game()
+
+    def show_account(self, account):
+        """Select the account, showing its games"""
+        if self.account_model.row_of(account) < 0:
+            # Hidden by the account filter
+            self.account_search_edit.clear()
+            self.account_filter.run()
+        self.select_row(self.account_list, self.account_model, account)
+        if self.show_all_games_button.isChecked():
+            self.show_all_games_button.setChecked(False)
+            self.toggle_show_all_games()
+
+    def show_all_games(self):
+        if not self.show_all_games_button.isChecked():
+            self.show_all_games_button.setChecked(True)
+            self.toggle_show_all_games()
+
     def toggle_show_all_games(self):
         """Toggle between showing all games and games from the selected account."""
         if self.show_all_games_button.isChecked():
@@ -317,93 +376,138 @@ class MultiSteamLauncher(QMainWindow):
     
     def show_status(self, message, timeout=0):
         """Show a status message with a modern style"""
-        status_bar = self.statusBar()
-        status_bar.showMessage(message, timeout)
-        status_bar.setStyleSheet("color: white;")
+        self.statusBar().showMessage(message, timeout)
+
+    def selected_account_id(self):
+        index = self.account_list.currentIndex()
+        return index.data(Qt.UserRole) if index.isValid() else None
+
+    def selected_account(self):
+        """The account behind the selected row, looked up by id"""
+        return self.registry.account(self.selected_account_id())
+
+    def current_game_index(self):
+        index = self.game_list.currentIndex()
+        return index if index.isValid() else None
+
+    def item_game(self, index):
+        """The (account, game) pair behind a game list row, looked up by id"""
+        game = self.registry.game(index.data(Qt.UserRole))
+        if game is None:
+            return None, None
+        return self.registry.account_of(game), game
 
     def filter_accounts(self):
         """Filter accounts based on search text"""
-        search_text = self.account_search_edit.text().lower()
-        
-        for i in range(self.account_list.count()):
-            item = self.account_list.item(i)
-            account = self.accounts[i]
-            
-            if (search_text in account.name.lower() or 
-                search_text in account.username.lower()):
-                item.setHidden(False)
-            else:
-                item.setHidden(True)
-    
+        self.account_filter.set_text(self.account_search_edit.text())
+
     def filter_games(self):
         """Filter games based on search text."""
-        search_text = self.game_search_edit.text().lower()
-
-        for i in range(self.game_list.count()):
-            item = self.game_list.item(i)
-            account, game = item.data(Qt.UserRole)
+        self.game_filter.set_text(self.game_search_edit.text())
+
+    def account_filter_for(self, query):
+        if not query:
+            return None
+        return (
+            lambda account: self.search.account_matches(account, query),
+            lambda accounts, cancelled=None: self.search.select_accounts(accounts, query, cancelled),
+        )
 
-            if (search_text in game.name.lower() or 
-                search_text in game.app_id.lower() or
-                (self.show_all_games_button.isChecked() and search_text in account.name.lower())):
-                item.setHidden(False)
-            else:
-                item.setHidden(True)
+    def game_filter_for(self, query):
+        selection = self.game_facets
+        if not query and not selection:
+            return None
+        # The account name is only searched while every account's games are shown
+        model = self.game_model
+
+        def predicate(game):
+            return (not query or self.search.game_matches(game, query, model.show_accounts)) and (
+                not selection or self.facets.matches(game, selection))
+
+        def select(games, cancelled=None):
+            if query:
+                games = self.search.select_games(games, query, model.show_accounts, cancelled)
+            if selection and games is not None:
+                games = self.facets.select(games, selection, cancelled)
+            return games
+
+        return predicate, select
+
+    def update_facet_menu(self):
+        """List every facet value with the number of games selecting it would show"""
+        menu = self.facet_menu
+        menu.clear()
+        selection = self.game_facets
+        counts = self.facets.counts(selection)
+
+        def add_values(facet, labels):
+            for value, label in labels:
+                action = menu.addAction(f"{label} ({counts[facet].get(value, 0)})")
+                action.setCheckable(True)
+                action.setChecked(value in selection.values(facet))
+                action.setData((facet, value))
+
+        add_values(VaultFacets.KIND, [(kind, kind) for kind in (VaultFacets.STEAM, VaultFacets.NON_STEAM)])
+        tags = sorted(set(counts[VaultFacets.TAG]) | selection.tags, key=str.lower)
+        if tags:
+            menu.addSection("Tags")
+            add_values(VaultFacets.TAG, [(tag, tag) for tag in tags])
+        menu.addSection("Accounts")
+        add_values(VaultFacets.ACCOUNT, [(account.id, account.name) for account in self.registry.accounts])
+        if selection:
+            menu.addSeparator()
+            menu.addAction("Clear Filters").setData(None)
+
+    def toggle_facet(self, action):
+        key = action.data()
+        if key is None:
+            self.game_facets = FacetSelection()
+        else:
+            self.game_facets = self.game_facets.toggled(*key)
+        count = len(self.game_facets)
+        self.facet_button.setText(f"Filters ({count})" if count else "Filters")
+        self.game_filter.run()
+
+    def facets_changed(self):
+        if self.facet_menu.isVisible():
+            self.update_facet_menu()
     
     def sort_accounts(self):
         """Sort accounts based on selected criteria"""
         current_index = self.account_sort_combo.currentIndex()
-        
-        if current_index == 0:  # Sort by Name
-            self.accounts.sort(key=lambda x: x.name.lower())
-        elif current_index == 1:  # Sort by Username
-            self.accounts.sort(key=lambda x: x.username.lower())
-        elif current_index == 2:  # Sort by Number of Games
-            self.accounts.sort(key=lambda x: len(x.games), reverse=True)
-            
-        self.update_account_list()
+        selected = self.selected_account()
+
+        # Only the view is sorted; the vault keeps its order
+        orders = ["name", "username", "games"]  # Name, Username, Number of Games
+        if 0 <= current_index < len(orders):
+            self.account_model.sort_by(orders[current_index])
+
+        # Selecting an account leaves the all-games view, so only reselect outside it
+        if not self.show_all_games_button.isChecked():
+            self.select_row(self.account_list, self.account_model, selected)
         
     def sort_games(self):
         """Sort games in the game list based on selected criteria."""
         current_index = self.game_sort_combo.currentIndex()
+        index = self.current_game_index()
+        selected = self.item_game(index)[1] if index else None
 
-        # Create a temporary list of (account, game) tuples for sorting
-        game_data = []
+        # The model keeps every order it has shown sorted, so switching back is cheap
+        orders = ["name", "app_id", "account"]  # Name, App ID, Account
+        if 0 <= current_index < len(orders):
+            self.game_model.sort_by(orders[current_index])
 
-        if self.show_all_games_button.isChecked():
-            # All games view
-            for account in self.accounts:
-                for game in account.games:
-                    game_data.append((account, game))
-        else:
-            # Single account view
-            selected_account_index = self.account_list.currentRow()
-            if selected_account_index >= 0 and selected_account_index < len(self.accounts):
-                account = self.accounts[selected_account_index]
-                game_data = [(account, game) for game in account.games]
-
-        # Apply sorting
-        if current_index == 0:  # Sort by Name
-            game_data.sort(key=lambda x: x[1].name.lower())
-        elif current_index == 1:  # Sort by App ID
-            game_data.sort(key=lambda x: x[1].app_id)
-        elif current_index == 2:  # Sort by Account
-            game_data.sort(key=lambda x: x[0].name.lower())
-
-        # Rebuild game list with sorted data
-        self.game_list.clear()
-
-        for account, game in game_data:
-            item = QListWidgetItem(game.name)
-            item.setData(Qt.UserRole, (account, game))
-            auto_login = "Auto-login" if account.auto_login else "Manual login"
-            item.setToolTip(f"App ID: {game.app_id}\nAccount: {account.username} ({auto_login})" if game.is_steam_game else "Non-Steam Game")
-
-            self.game_list.addItem(item)
+        self.select_row(self.game_list, self.game_model, selected)
+
+    def select_row(self, view, model, obj):
+        """Make obj the current row again after the model was rebuilt"""
+        row = model.row_of(obj)
+        if row >= 0:
+            view.setCurrentIndex(model.index(row))
+            view.scrollTo(model.index(row))
 
     def show_account_context_menu(self, position):
-        index = self.account_list.currentRow()
-        if index < 0:
+        if self.selected_account() is None:
             return
             
         menu = QMenu()
@@ -418,7 +522,7 @@ class MultiSteamLauncher(QMainWindow):
             self.delete_account()
     
     def show_game_context_menu(self, position):
-        item = self.game_list.currentItem()
+        item = self.current_game_index()
         if not item:
             return
             
@@ -470,17 +574,15 @@ class MultiSteamLauncher(QMainWindow):
                 data["auto_login"]
             )
             
-            self.accounts.append(account)
-            self.update_account_list()
+            self.registry.add_account(account)
             self.save_config()
     
     def edit_account(self):
-        if not self.account_list.currentItem():
+        if self.selected_account() is None:
             QMessageBox.information(self, "No Selection", "<span style='color: black;'>Please select an account to edit.</span>")
             return
             
-        index = self.account_list.currentRow()
-        account = self.accounts[index]
+        account = self.selected_account()
         
         # Create a dialog pre-filled with account data
         dialog = AddAccountDialog(self)
@@ -511,15 +613,12 @@ class MultiSteamLauncher(QMainWindow):
             account.password_hint = data["password_hint"]
             account.auto_login = data["auto_login"]
             
-            self.update_account_list()
             self.save_config()
     
     def delete_account(self):
-        index = self.account_list.currentRow()
-        if index < 0:
+        account = self.selected_account()
+        if account is None:
             return
-            
-        account = self.accounts[index]
         
         # Confirm deletion
         confirm = QMessageBox.question(
@@ -530,17 +629,15 @@ class MultiSteamLauncher(QMainWindow):
         )
         
         if confirm == QMessageBox.Yes:
-            self.accounts.pop(index)
-            self.update_account_list()
-            self.update_game_list()
+            self.registry.remove_account(account)
             self.save_config()
   
     def add_game(self):
-        if not self.accounts:
+        if not self.registry.accounts:
             QMessageBox.warning(self, "<span style='color: black;'>No Accounts", "Please add at least one Steam account first.</span>")
             return
 
-        dialog = GameDialog(self.accounts, self)
+        dialog = GameDialog(self.registry.accounts, self, current_account_id=self.selected_account_id())
         if dialog.exec_():
             data = dialog.get_game_data()
 
@@ -548,45 +645,39 @@ class MultiSteamLauncher(QMainWindow):
                 QMessageBox.warning(self, "Input Error", "<span style='color: black;'>Game name is required.</span>")
                 return
 
-            account = self.accounts[data["account_index"]] if data["is_steam_game"] else None
-            game = Game(data["name"], data["app_id"], data["path"], is_steam_game=data["is_steam_game"])
+            account = self.registry.account(data["account_id"]) if data["is_steam_game"] else None
+            game = Game(data["name"], data["app_id"], data["path"], is_steam_game=data["is_steam_game"], tags=data["tags"])
 
             if data["is_steam_game"]:
                 account.games.append(game)
             else:
                 # Add non-Steam game to the first account (or create a new account for non-Steam games)
-                if self.accounts:
-                    self.accounts[0].games.append(game)
+                if self.registry.accounts:
+                    self.registry.accounts[0].games.append(game)
                 else:
                     # Create a dummy account for non-Steam games
                     dummy_account = SteamAccount("Non-Steam Games", "non-steam")
                     dummy_account.games.append(game)
-                    self.accounts.append(dummy_account)
+                    self.registry.add_account(dummy_account)
 
-            self.update_game_list()
             self.save_config()
 
     def edit_game(self):
-        if not self.game_list.currentItem():
+        item = self.current_game_index()
+        if not item:
             QMessageBox.information(self, "<span style='color: black;'>No Selection", "Please select a game to edit.</span>")
             return
             
-        item = self.game_list.currentItem()
-        current_account, current_game = item.data(Qt.UserRole)
-        
-        # Find account index
-        account_index = 0
-        for i, account in enumerate(self.accounts):
-            if account == current_account:
-                account_index = i
-                break
+        current_account, current_game = self.item_game(item)
+        if current_game is None:
+            return
             
         # Create edit dialog
         dialog = GameDialog(
-            self.accounts, 
+            self.registry.accounts, 
             self, 
             edit_mode=True,
-            current_account_index=account_index, 
+            current_account_id=current_account.id, 
             current_game=current_game
         )
         
@@ -602,26 +693,28 @@ class MultiSteamLauncher(QMainWindow):
             current_game.app_id = data["app_id"]
             current_game.path = data["path"]
             current_game.is_steam_game = data["is_steam_game"]
+            current_game.tags = data["tags"]
             
             # Check if account changed (only for Steam games)
             if data["is_steam_game"]:
-                new_account_index = data["account_index"]
-                if new_account_index != account_index:
+                new_account = self.registry.account(data["account_id"])
+                if new_account is not None and new_account is not current_account:
                     # Remove from old account
                     current_account.games.remove(current_game)
                     
                     # Add to new account
-                    self.accounts[new_account_index].games.append(current_game)
+                    new_account.games.append(current_game)
             
-            self.update_game_list()
             self.save_config()
     
     def delete_game(self):
-        item = self.game_list.currentItem()
+        item = self.current_game_index()
         if not item:
             return
 
-        account, game = item.data(Qt.UserRole)
+        account, game = self.item_game(item)
+        if game is None:
+            return
 
         # Confirm deletion
         confirm = QMessageBox.question(
@@ -632,12 +725,11 @@ class MultiSteamLauncher(QMainWindow):
 
         if confirm == QMessageBox.Yes:
             account.games.remove(game)
-            self.update_game_list()
             self.save_config()
     
     def account_selected(self, index):
         """Handle account selection and automatically disable 'Show All Games' mode."""
-        if index >= 0 and index < len(self.accounts):
+        if self.selected_account() is not None:
             # Uncheck the "Show All Games" button
             if self.show_all_games_button.isChecked():
                 self.show_all_games_button.setChecked(False)
@@ -646,81 +738,42 @@ class MultiSteamLauncher(QMainWindow):
             # Update the game list to show only the selected account's games
             self.update_game_list()
     
-    def update_account_list(self):
-        self.account_list.clear()
-        for account in self.accounts:
-            item = QListWidgetItem(account.name)
-            auto_login_status = "Auto-login enabled" if account.auto_login else "Manual login"
-            item.setToolTip(f"Username: {account.username}\nGames: {len(account.games)}\n{auto_login_status}")
-            self.account_list.addItem(item)
-    
     def update_game_list(self):
-        self.game_list.clear()
-
         if self.show_all_games_button.isChecked():
             # Show all games from every account
-            for account in self.accounts:
-                for game in account.games:
-                    if game.is_steam_game:
-                        item = QListWidgetItem(f"{game.name}")
-                    else:
-                        item = QListWidgetItem(f"{game.name}")
-                    item.setData(Qt.UserRole, (account, game))
-                    # Set tooltip with game info
-                    auto_login = "Auto-login" if account.auto_login else "Manual login"
-                    item.setToolTip(f"App ID: {game.app_id}\nAccount: {account.username} ({auto_login})" if game.is_steam_game else "Non-Steam Game")
-                    self.game_list.addItem(item)
+            self.game_model.show_all()
         else:
             # Show games for the selected account
-            if self.account_list.currentRow() >= 0:
-                account = self.accounts[self.account_list.currentRow()]
-                for game in account.games:
-                    if game.is_steam_game:
-                        item = QListWidgetItem(game.name)
-                    else:
-                        item = QListWidgetItem(f"{game.name} (Non-Steam)")
-                    item.setData(Qt.UserRole, (account, game))
-                    item.setToolTip(f"App ID: {game.app_id}" if game.is_steam_game else "Non-Steam Game")
-                    self.game_list.addItem(item)
+            self.game_model.show_account(self.selected_account())
 
     def launch_selected_game(self):
-        current_item = self.game_list.currentItem()
+        current_item = self.current_game_index()
         if current_item:
             self.launch_game(current_item)
     
     def launch_game(self, item):
-        account, game = item.data(Qt.UserRole)
-        
+        account, game = self.item_game(item)
+        if game is not None:
+            self.launch(account, game)
+
+    def launch(self, account, game):
         if game.is_steam_game:
             if not self.steam_path:
                 QMessageBox.warning(self, "Steam Path Not Set", 
                                   "<span style='color: black;'>Please set the path to Steam.exe first.</span>")
                 self.set_steam_path()
                 return
-            
-            # Prepare progress dialog
-            progress = QProgressDialog("Launching game...", "Cancel", 0, 0, self)
-            progress.setWindowTitle(f"Launching {game.name}")
-            progress.setMinimumDuration(500)
-            progress.setCancelButton(None)
-            progress.setWindowModality(Qt.WindowModal)
+            self.palette_index.record_launch(game)
             
             # Password check for non-auto-login accounts
             password = None
-            if account.auto_login and account.password:
+            if account.auto_login and account.has_password:
                 password = account.password
             
-            # Launch the game with the associated account
-            self.launch_thread = LaunchThread(
-                self.steam_path, 
-                account.username,
-                password,
-                game.app_id
-            )
-            
-            # Connect signals
-            self.launch_thread.launch_progress.connect(progress.setLabelText)
-            self.launch_thread.launch_finished.connect(lambda: progress.close())
+            # Queue the game; the scheduler signs in once for every game queued on an account
+            if not self.launch_scheduler.submit(self.steam_path, account.username, password, game.app_id):
+                self.show_status(f"{game.name} is already queued", 3000)
+                return
             
             # Show the password hint if needed
             if not account.auto_login and account.password_hint:
@@ -731,13 +784,12 @@ class MultiSteamLauncher(QMainWindow):
                 hint_msg.setStandardButtons(QMessageBox.Ok)
                 hint_msg.show()
             
-            # Start the launch process
-            progress.show()
-            self.launch_thread.start()
+            self.launch_dialog.show()
         else:
             # Launch non-Steam game directly
             try:
                 subprocess.Popen(game.path)
+                self.palette_index.record_launch(game)
             except Exception as e:
                 QMessageBox.warning(self, "Launch Error", f"<span style='color: black;'>Failed to launch game: {str(e)}</span>")
 
@@ -760,51 +812,56 @@ class MultiSteamLauncher(QMainWindow):
         
         if file_path:
             self.steam_path = file_path
-            self.save_config()
+            # Written right away rather than after the burst of edits settles
+            self.save_config(force=True)
     
+    def create_store(self):
+        """Open the storage backend selected in config.py"""
+        if STORAGE_BACKEND == "sqlite":
+            return SqliteStore(DATABASE_PATH, self.encryption_handler)
+        return JournalStore(CONFIG_PATH, self.encryption_handler)
+
     def save_config(self, force=False):
-        # Prevent excessive saves
-        if hasattr(self, '_saving_config') and not force:
-            return
+        """Queue the current vault for writing; `force` waits until it is on disk"""
+        self.config_writer.submit(self.steam_path, self.registry.accounts)
+        if force:
+            self.config_writer.flush()
+
+    def config_saved(self, latency, size):
+        self.show_status(f"Configuration saved ({size} bytes in {latency:.0f} ms)", 3000)
+
+    def config_save_failed(self, error):
+        QMessageBox.warning(self, "Config Save Error", f"<span style='color: black;'>Failed to save configuration: {error}</span>")
 
+    def closeEvent(self, event):
+        self.account_filter.stop()
+        self.game_filter.stop()
+        self.launch_scheduler.stop()
+        self.config_writer.stop()
+        super().closeEvent(event)
+
+    def load_config(self):
         try:
-            self._saving_config = True
-            config = {
-                "steam_path": self.steam_path,
-                "accounts": [account.to_dict(self.encryption_handler) for account in self.accounts]
-            }
-
-            with open(CONFIG_PATH, 'w') as f:
-                json.dump(config, f, indent=2)
+            # First start on the SQLite backend: bring over the JSON vault
+            imported = self.store.migrate_json(CONFIG_PATH) if isinstance(self.store, SqliteStore) else None
+            if imported is not None:
+                self.steam_path, accounts = imported
+            else:
+                self.steam_path, accounts = self.store.load()
         except Exception as e:
-            QMessageBox.warning(self, "Config Save Error", f"<span style='color: black;'>Failed to save configuration: {str(e)}</span>")
-        finally:
-            delattr(self, '_saving_config')
+            QMessageBox.warning(self, "Config Load Error", f"<span style='color: black;'>Failed to load configuration: {str(e)}</span>")
+            return
+
+        # Replace the existing accounts to prevent duplication
+        self.registry.set_accounts(accounts)
+        self.update_game_list()
 
-    def load_config(self):
-        if os.path.exists(CONFIG_PATH):
-            try:
-                with open(CONFIG_PATH, 'r') as f:
-                    config = json.load(f)
-                    
-                    self.steam_path = config.get("steam_path", "")
-                    
-                    # Clear existing accounts to prevent duplication
-                    self.accounts.clear()
-                    
-                    for account_data in config.get("accounts", []):
-                        account = SteamAccount.from_dict(account_data, self.encryption_handler)
-                        self.accounts.append(account)
-                    
-                    self.update_account_list()
-                    self.update_game_list()
-            except Exception as e:
-                QMessageBox.warning(self, "Config Load Error", f"<span style='color: black;'>Failed to load configuration: {str(e)}</span>")
 
 
 def main():
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
+    apply_theme(app)
     
     window = MultiSteamLauncher()
     window.show()
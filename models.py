@@ -0,0 +1,561 @@
+import bisect
+
+from PyQt5.QtCore import *
+
+
+class _CachedKeys:
+    """The cached keys of a list of objects, as a sequence that bisect can search
+
+    bisect takes a key function only from Python 3.10 on.
+    """
+    __slots__ = ("objects", "keys")
+
+    def __init__(self, objects, keys):
+        self.objects = objects
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, index):
+        return self.keys[self.objects[index]]
+
+
+class _SortOrder:
+    """One sort order of a model's objects, kept sorted as objects come, go and change.
+
+    Each object's key is computed once and cached, so bisecting and re-sorting
+    never recompute keys. An order keeps being maintained while another one is
+    shown, so switching back to it is a swap of lists rather than a sort.
+    """
+    __slots__ = ("key", "keys", "objects")
+
+    def __init__(self, key):
+        self.key = key
+        self.keys = {}
+        # None until the order is first shown, and again after a reset
+        self.objects = None
+
+    def build(self, objects):
+        """Sort objects, given in vault order"""
+        self.keys = keys = dict(zip(objects, map(self.key, objects)))
+        self.objects = sorted(objects, key=keys.__getitem__)
+
+    def clear(self):
+        self.keys = {}
+        self.objects = None
+
+    def position(self, objects, obj):
+        """Where obj goes among sorted objects, after the ones with an equal key"""
+        keys = self.keys
+        return bisect.bisect_right(_CachedKeys(objects, keys), keys[obj])
+
+    def index(self, objects, obj):
+        """Position of obj among sorted objects, found by its cached key"""
+        keys = self.keys
+        return objects.index(obj, bisect.bisect_left(_CachedKeys(objects, keys), keys[obj]))
+
+    def add(self, obj):
+        self.keys[obj] = self.key(obj)
+        self.objects.insert(self.position(self.objects, obj), obj)
+
+    def discard(self, obj):
+        del self.objects[self.index(self.objects, obj)]
+        del self.keys[obj]
+
+    def rekey(self, obj):
+        """Move obj to where its new key puts it"""
+        key = self.key(obj)
+        if key == self.keys[obj]:
+            return
+        objects = self.objects
+        del objects[self.index(objects, obj)]
+        self.keys[obj] = key
+        objects.insert(self.position(objects, obj), obj)
+
+
+class VaultListModel(QAbstractListModel):
+    """List model over vault objects that follows the registry's change notifications.
+
+    `_vault` holds every object of the view in vault order, each sort order of
+    SORT_ORDERS that was shown keeps them sorted by its key, and `_all` is
+    whichever of those lists is shown. `_rows` holds the objects passing the
+    filter (the same list as `_all` when there is no filter). A single edit
+    inserts, removes, moves or repaints one row, so the view keeps its scroll
+    position and selection; text and tooltips are computed in data() only for
+    the rows being painted.
+    """
+
+    # Changes touching more rows than this rebuild the list instead
+    BULK_THRESHOLD = 256
+    # Sort order name -> key function
+    SORT_ORDERS = {}
+
+    def __init__(self, registry, parent=None):
+        super().__init__(parent)
+        self.registry = registry
+        self._vault = []
+        self._all = self._vault
+        self._present = set()
+        self._rows = self._all
+        self._visible = self._present
+        self._filter = None
+        self._select = None
+        self._orders = {name: _SortOrder(key) for name, key in self.SORT_ORDERS.items()}
+        self._order = None
+        # Bumped whenever the objects or their order change
+        self.revision = 0
+
+    def items(self):
+        """The objects of the current view, in vault order"""
+        return []
+
+    def predecessors(self, obj):
+        """The objects before obj in vault order, nearest first"""
+        return []
+
+    def display_text(self, obj):
+        return obj.name
+
+    def tooltip(self, obj):
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        obj = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return self.display_text(obj)
+        if role == Qt.ToolTipRole:
+            return self.tooltip(obj)
+        if role == Qt.UserRole:
+            return obj.id
+        return None
+
+    def at(self, row):
+        """The object shown in a row, or None"""
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def row_of(self, obj):
+        """Row showing the object, or -1"""
+        return self._rows.index(obj) if obj is not None and obj in self.visible() else -1
+
+    def objects(self):
+        """Every object of the view in display order, filtered or not"""
+        return self._all
+
+    def refresh(self):
+        """Rebuild every row from the vault"""
+        self.revision += 1
+        self.beginResetModel()
+        self._vault = list(self.items())
+        self._present = set(self._vault)
+        for order in self._orders.values():
+            order.clear()
+        self._all = self._vault
+        if self._order is not None:
+            self._order.build(self._vault)
+            self._all = self._order.objects
+        self._apply_filter()
+        self.endResetModel()
+
+    def set_filter(self, predicate, select=None, refine=False):
+        """Show only the objects for which predicate(obj) is true; None shows all.
+
+        `select(objects)` may return the objects passing the predicate for a
+        whole list at once, e.g. from a search index, so lists are filtered
+        without calling the predicate per object. Otherwise `refine` says the
+        new predicate only narrows the rows shown now.
+        """
+        self.beginResetModel()
+        self._filter = predicate
+        self._select = select if predicate is not None else None
+        self._apply_filter(refine)
+        self.endResetModel()
+
+    def apply_filter(self, predicate, rows, select=None):
+        """Set the filter together with its rows, computed from objects() elsewhere"""
+        self.beginResetModel()
+        self._filter = predicate
+        self._select = select
+        self._rows = rows
+        self._visible = None
+        self.endResetModel()
+
+    def sort_by(self, name):
+        """Show the objects in the named sort order of SORT_ORDERS; None restores vault order"""
+        order = self._orders[name] if name is not None else None
+        self.revision += 1
+        self.beginResetModel()
+        self._order = order
+        if order is None:
+            self._all = self._vault
+        else:
+            if order.objects is None:
+                order.build(self._vault)
+            self._all = order.objects
+        self._apply_filter()
+        self.endResetModel()
+
+    def resort(self, objects):
+        """Recompute the sort keys of many objects at once, e.g. after an edit they all depend on"""
+        self.revision += 1
+        self.beginResetModel()
+        self._rekey_orders(objects)
+        if self._order is not None:
+            self._all = self._order.objects
+        self._apply_filter()
+        self.endResetModel()
+
+    def _rekey_orders(self, objects):
+        """Recompute the sort keys of the objects in every built order"""
+        for order in self._built_orders():
+            keys, key = order.keys, order.key
+            changed = False
+            for obj in objects:
+                if obj in keys:
+                    value = key(obj)
+                    if value != keys[obj]:
+                        keys[obj] = value
+                        changed = True
+            if changed:
+                # Nearly sorted already, so this is close to a single pass. A new
+                # list, since caches elsewhere are tied to the old one's order
+                order.objects = sorted(order.objects, key=keys.__getitem__)
+
+    def visible(self):
+        """The set of objects shown in the rows"""
+        if self._visible is None:
+            self._visible = set(self._rows)
+        return self._visible
+
+    def accepts(self, obj):
+        return self._filter is None or self._filter(obj)
+
+    def insert(self, obj):
+        if obj in self._present:
+            return
+        self.revision += 1
+        vault_position = self._vault_position(obj)
+        order = self._order
+        if order is None:
+            position = vault_position
+        else:
+            order.keys[obj] = order.key(obj)
+            position = order.position(self._all, obj)
+
+        if self._rows is self._all:
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._add(obj, vault_position)
+            self.endInsertRows()
+            return
+        self._add(obj, vault_position)
+        if self.accepts(obj):
+            self._show(obj, position)
+
+    def remove(self, obj):
+        if obj not in self._present:
+            return
+        self.revision += 1
+        if self._rows is not self._all:
+            if obj in self.visible():
+                self._hide(obj)
+            self._discard(obj)
+            return
+        row = self._index(obj)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self._discard(obj)
+        self.endRemoveRows()
+
+    def update(self, obj):
+        """Re-check an edited object against the filter and the sort orders"""
+        if obj not in self._present:
+            self.insert(obj)
+            return
+        self.revision += 1
+
+        # The orders not shown have no rows to report
+        order = self._order
+        for other in self._built_orders():
+            if other is not order:
+                other.rekey(obj)
+
+        if self._rows is not self._all:
+            if order is not None:
+                # Silently reposition the object among all objects
+                order.rekey(obj)
+            visible = obj in self.visible()
+            accepted = self.accepts(obj)
+            if visible and not accepted:
+                self._hide(obj)
+                return
+            if accepted and not visible:
+                self._show(obj, self._index(obj))
+                return
+            if not visible:
+                return
+            row = self._rows.index(obj)
+        else:
+            row = self._index(obj)
+
+        rows = self._rows
+        if order is not None:
+            del rows[row]
+            if rows is self._all:
+                order.keys[obj] = order.key(obj)
+            target = order.position(rows, obj)
+            rows.insert(row, obj)
+            if target != row:
+                self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target if target < row else target + 1)
+                del rows[row]
+                rows.insert(target, obj)
+                self.endMoveRows()
+                row = target
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def repaint_rows(self):
+        """Redraw every row, for changes that affect the text of many rows at once"""
+        if self._rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self._rows) - 1))
+
+    def _apply_filter(self, refine=False):
+        predicate = self._filter
+        if predicate is None:
+            self._rows = self._all
+            self._visible = self._present
+            return
+        if self._select is not None:
+            rows = self._select(self._all)
+        else:
+            rows = [obj for obj in (self._rows if refine else self._all) if predicate(obj)]
+        self._rows = rows
+        # Built on the first edit, so typing into the filter does not pay for it
+        self._visible = None
+
+    def _built_orders(self):
+        return [order for order in self._orders.values() if order.objects is not None]
+
+    def _add(self, obj, vault_position):
+        """Put obj in vault order and every maintained sort order"""
+        self._vault.insert(vault_position, obj)
+        self._present.add(obj)
+        for order in self._built_orders():
+            order.add(obj)
+
+    def _discard(self, obj):
+        self._vault.remove(obj)
+        self._present.discard(obj)
+        for order in self._built_orders():
+            order.discard(obj)
+
+    def _index(self, obj):
+        """Position of obj in _all"""
+        if self._order is None:
+            return self._all.index(obj)
+        return self._order.index(self._all, obj)
+
+    def _show(self, obj, position):
+        """Insert a filtered object that is at `position` among all objects into the rows"""
+        rows = self._rows
+        if self._order is not None:
+            row = self._order.position(rows, obj)
+        else:
+            row = 0
+            objects = self._all
+            visible = self.visible()
+            for previous in range(position - 1, -1, -1):
+                if objects[previous] in visible:
+                    row = rows.index(objects[previous]) + 1
+                    break
+        self.beginInsertRows(QModelIndex(), row, row)
+        rows.insert(row, obj)
+        self.visible().add(obj)
+        self.endInsertRows()
+
+    def _hide(self, obj):
+        row = self._rows.index(obj)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.visible().discard(obj)
+        self.endRemoveRows()
+
+    def _vault_position(self, obj):
+        for previous in self.predecessors(obj):
+            if previous in self._present:
+                return self._vault.index(previous) + 1
+        return 0
+
+
+class AccountListModel(VaultListModel):
+    SORT_ORDERS = {
+        "name": lambda account: account.name.lower(),
+        "username": lambda account: account.username.lower(),
+        # Most games first
+        "games": lambda account: -len(account.games),
+    }
+
+    def __init__(self, registry, parent=None):
+        super().__init__(registry, parent)
+        registry.accounts_reset.connect(self.refresh)
+        registry.accounts_inserted.connect(self.accounts_inserted)
+        registry.accounts_removed.connect(self.accounts_removed)
+        registry.account_changed.connect(self.update)
+        # The tooltip shows the number of games
+        registry.games_inserted.connect(lambda account, first, last: self.update(account))
+        registry.games_removed.connect(lambda account, first, last, games: self.update(account))
+        registry.games_reset.connect(self.update)
+
+    def items(self):
+        return self.registry.accounts
+
+    def predecessors(self, account):
+        accounts = self.registry.accounts
+        for position in range(self.registry.account_index(account) - 1, -1, -1):
+            yield accounts[position]
+
+    def tooltip(self, account):
+        auto_login_status = "Auto-login enabled" if account.auto_login else "Manual login"
+        return f"Username: {account.username}\nGames: {len(account.games)}\n{auto_login_status}"
+
+    def accounts_inserted(self, first, last):
+        if last - first >= self.BULK_THRESHOLD:
+            self.refresh()
+            return
+        for account in self.registry.accounts[first:last + 1]:
+            self.insert(account)
+
+    def accounts_removed(self, first, last, accounts):
+        if len(accounts) >= self.BULK_THRESHOLD:
+            self.refresh()
+            return
+        for account in accounts:
+            self.remove(account)
+
+
+class GameListModel(VaultListModel):
+    """Games of one account, or of every account when `show_accounts` is set"""
+
+    SORT_ORDERS = {
+        "name": lambda game: game.name.lower(),
+        "app_id": lambda game: game.app_id,
+        "account": lambda game: game._owner.name.lower(),
+    }
+
+    def __init__(self, registry, parent=None):
+        super().__init__(registry, parent)
+        self.account = None
+        self.show_accounts = False
+        registry.accounts_reset.connect(self.accounts_reset)
+        registry.accounts_inserted.connect(self.accounts_inserted)
+        registry.accounts_removed.connect(self.accounts_removed)
+        registry.account_changed.connect(self.account_changed)
+        registry.games_reset.connect(self.games_reset)
+        registry.games_inserted.connect(self.games_inserted)
+        registry.games_removed.connect(self.games_removed)
+        registry.game_changed.connect(self.game_changed)
+
+    def show_account(self, account):
+        """Show the games of one account, or nothing for None"""
+        self.account = account
+        self.show_accounts = False
+        self.refresh()
+
+    def show_all(self):
+        self.account = None
+        self.show_accounts = True
+        self.refresh()
+
+    def shows(self, account):
+        return self.show_accounts or (account is not None and account is self.account)
+
+    def items(self):
+        if self.show_accounts:
+            return (game for _, game in self.registry.all_games())
+        return self.account.games if self.account is not None else []
+
+    def predecessors(self, game):
+        account = game._owner
+        games = account.games
+        for position in range(games.index(game) - 1, -1, -1):
+            yield games[position]
+        if self.show_accounts:
+            accounts = self.registry.accounts
+            for position in range(self.registry.account_index(account) - 1, -1, -1):
+                yield from reversed(accounts[position].games)
+
+    def display_text(self, game):
+        if game.is_steam_game or self.show_accounts:
+            return game.name
+        return f"{game.name} (Non-Steam)"
+
+    def tooltip(self, game):
+        if not game.is_steam_game:
+            return "Non-Steam Game"
+        tooltip = f"App ID: {game.app_id}"
+        if self.show_accounts:
+            account = game._owner
+            auto_login = "Auto-login" if account.auto_login else "Manual login"
+            tooltip += f"\nAccount: {account.username} ({auto_login})"
+        if game.tags:
+            tooltip += f"\nTags: {', '.join(sorted(game.tags))}"
+        return tooltip
+
+    def accounts_reset(self):
+        if self.account is not None and self.registry.account(self.account.id) is not self.account:
+            self.show_account(None)
+        elif self.show_accounts:
+            self.refresh()
+
+    def accounts_inserted(self, first, last):
+        if not self.show_accounts:
+            return
+        for account in self.registry.accounts[first:last + 1]:
+            self.games_inserted(account, 0, len(account.games) - 1)
+
+    def accounts_removed(self, first, last, accounts):
+        if self.account in accounts:
+            self.show_account(None)
+        elif self.show_accounts:
+            for account in accounts:
+                self.games_removed(account, 0, len(account.games) - 1, list(account.games))
+
+    def account_changed(self, account):
+        if not self.shows(account):
+            return
+        # Tooltips, the filter and the sort order may all use the account's fields
+        if self._filter is not None or self._order is not None:
+            self.resort(account.games)
+        else:
+            # The orders not shown have no rows to report, but must not keep stale keys
+            self._rekey_orders(account.games)
+            self.repaint_rows()
+
+    def games_reset(self, account):
+        if self.shows(account):
+            self.refresh()
+
+    def games_inserted(self, account, first, last):
+        if not self.shows(account) or last < first:
+            return
+        if last - first >= self.BULK_THRESHOLD:
+            self.refresh()
+            return
+        for game in account.games[first:last + 1]:
+            self.insert(game)
+
+    def games_removed(self, account, first, last, games):
+        if not self.shows(account):
+            return
+        if len(games) >= self.BULK_THRESHOLD:
+            self.refresh()
+            return
+        for game in games:
+            self.remove(game)
+
+    def game_changed(self, game):
+        if self.shows(game._owner):
+            self.update(game)
@@ -0,0 +1,416 @@
+import bisect
+import collections
+import heapq
+import itertools
+import operator
+import re
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout
+
+from game import Game
+
+
+def _rank(text):
+    """Order of texts within a tier: shorter texts are closer matches"""
+    return (len(text), text)
+
+
+class _Ranks:
+    """The ranks of a list of texts, as a sequence that bisect can search
+
+    bisect takes a key function only from Python 3.10 on.
+    """
+    __slots__ = ("texts",)
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        return _rank(self.texts[index])
+
+
+def _separate(text):
+    """The text with every character that is not a letter or digit turned into a newline"""
+    return "".join(character if character.isalnum() else "\n" for character in text)
+
+
+def _at_word_start(query, text):
+    """Whether the query occurs in the text at the start or after a character that is not a letter or digit"""
+    position = text.find(query)
+    while position > 0 and text[position - 1].isalnum():
+        position = text.find(query, position + 1)
+    return position >= 0
+
+
+def _is_subsequence(short, text):
+    characters = iter(text)
+    return all(character in characters for character in short)
+
+
+class PaletteAction:
+    """A command listed in the palette, such as "Add Game" """
+    __slots__ = ("label", "callback")
+
+    def __init__(self, label, callback):
+        self.label = label
+        self.callback = callback
+
+
+class PaletteIndex:
+    """Fuzzy search over the vault's games and accounts and a list of actions, kept current from a VaultRegistry.
+
+    Targets are grouped by their casefolded text, so a title owned by many
+    accounts is matched once. A query ranks texts in tiers: prefix matches,
+    then matches at the start of a word, then substrings, then the query's
+    characters in order within one text. The texts are kept shortest first and
+    joined into one newline-separated string, so each tier is a scan in C for
+    a literal that yields texts best first and stops once enough results are
+    found. Recent launches get one tier of boost. When a query matches few
+    texts, a longer query only re-checks those.
+    """
+
+    RECENT_LIMIT = 50
+    # The fuzzy tier checks texts one by one when the query's rarest character is this rare
+    RARE_CHARACTER = 4096
+
+    def __init__(self, registry, actions=()):
+        self.registry = registry
+        self.actions = list(actions)
+        self._targets = {}
+        self._text_of = {}
+        self._ordered = []
+        self._blob = None
+        self._words = None
+        self._starts = None
+        self._character_counts = {}
+        self._recent = collections.OrderedDict()
+        self._last = None
+
+        registry.accounts_reset.connect(self.rebuild)
+        registry.accounts_inserted.connect(self.accounts_inserted)
+        registry.accounts_removed.connect(self.accounts_removed)
+        registry.account_changed.connect(self.account_changed)
+        registry.games_reset.connect(self.games_reset)
+        registry.games_inserted.connect(self.games_inserted)
+        registry.games_removed.connect(self.games_removed)
+        registry.game_changed.connect(self.game_changed)
+        self.rebuild()
+
+    def __len__(self):
+        return len(self._text_of)
+
+    def rebuild(self):
+        self._targets.clear()
+        self._text_of.clear()
+        self._ordered.clear()
+        self._changed()
+        # Sorted once at the end rather than inserted in order one by one
+        for action in self.actions:
+            self._add(action, (action.label,), keep_order=False)
+        for account in self.registry.accounts:
+            self._add_account(account, keep_order=False)
+        self._ordered.sort(key=_rank)
+
+    def record_launch(self, game):
+        self._recent.pop(game, None)
+        self._recent[game] = None
+        if len(self._recent) > self.RECENT_LIMIT:
+            self._recent.popitem(last=False)
+
+    def recent(self):
+        """Recently launched games, most recent first"""
+        return [game for game in reversed(self._recent) if game in self._text_of]
+
+    def search(self, query, limit=20):
+        """The best `limit` targets for the query, best first"""
+        query = query.strip().casefold()
+        if not query:
+            return (self.recent() + self.actions)[:limit]
+
+        # Rank key: boosted tier first, then recency, then text closeness, then the order found
+        recency = {game: position for position, game in enumerate(self.recent())}
+        unranked = len(recency)
+        candidates = []
+        order = itertools.count()
+        for game, position in recency.items():
+            tier = self._tier(query, self._text_of[game])
+            if tier is not None:
+                candidates.append(((-tier - 1, position, _rank(self._text_of[game][0]), next(order)), game))
+
+        # Texts of one tier are visited best first, so once `limit` targets
+        # are collected no later text can rank higher
+        found = 0
+        seen = {}
+        last = self._last
+        if last is not None and _is_subsequence(last[0], query):
+            # The previous query matched few enough texts to re-check them one by one
+            tiers = self._recheck(query, last[1])
+        else:
+            tiers = self._scan(query)
+        for tier, texts in tiers:
+            for text in texts:
+                if text in seen:
+                    continue
+                seen[text] = tier
+                for target in self._targets[text]:
+                    if target in recency:
+                        continue
+                    candidates.append(((-tier, unranked, _rank(text), next(order)), target))
+                    found += 1
+                if found >= limit:
+                    break
+            if found >= limit:
+                break
+
+        # Every matching text was seen, so a longer query only needs to look at these
+        self._last = (query, sorted(seen, key=_rank)) if found < limit else None
+        return [target for _, target in heapq.nsmallest(limit, candidates, key=operator.itemgetter(0))]
+
+    def prepare(self):
+        """Join the texts for scanning, if they changed since the last search"""
+        if self._blob is not None:
+            return
+        ordered = self._ordered
+        # Each text is preceded by a newline, so "\n" + query finds prefixes
+        self._blob = blob = "\n" + "\n".join(ordered) + "\n"
+        self._starts = list(itertools.accumulate((len(text) + 1 for text in ordered), initial=1))
+        # The same with every separator made a newline, so word starts look like prefixes
+        separators = {character: "\n" for character in set(blob) if not character.isalnum()}
+        self._words = blob.translate(str.maketrans(separators))
+        self._character_counts = {}
+
+    def _scan(self, query):
+        """(tier, texts) from the best tier down; texts are lazy and in rank order"""
+        self.prepare()
+        escaped = re.escape(query)
+        yield 3, self._finditer(re.compile("\n" + escaped), self._blob, 1)
+        yield 2, self._finditer(re.compile("\n" + re.escape(_separate(query))), self._words, 1, query)
+        yield 1, self._finditer(re.compile(escaped), self._blob)
+        yield 0, self._fuzzy(query)
+
+    def _fuzzy(self, query):
+        counts = self._character_counts
+        for character in set(query):
+            if character not in counts:
+                counts[character] = self._blob.count(character)
+        rarest = min(set(query), key=counts.__getitem__)
+        if counts[rarest] == 0:
+            return
+        if counts[rarest] > self.RARE_CHARACTER:
+            yield from self._finditer(re.compile("[^\n]*?".join(map(re.escape, query))), self._blob)
+            return
+
+        # Only the texts holding the rarest character can match
+        starts, ordered = self._starts, self._ordered
+        indexes = sorted({bisect.bisect_right(starts, match.start()) - 1 for match in re.finditer(re.escape(rarest), self._blob)})
+        for index in indexes:
+            if _is_subsequence(query, ordered[index]):
+                yield ordered[index]
+
+    def _recheck(self, query, texts):
+        by_tier = {3: [], 2: [], 1: [], 0: []}
+        for text in texts:
+            tier = self._tier(query, (text,))
+            if tier is not None:
+                by_tier[tier].append(text)
+        return sorted(by_tier.items(), reverse=True)
+
+    def _finditer(self, pattern, blob, skip=0, exact=None):
+        """The texts the pattern matches within, each once, in rank order.
+
+        A match starts `skip` characters before the text it is in. With
+        `exact`, the matched text must also read exactly that, so a pattern
+        on the separated texts still means a substring of the real ones.
+        """
+        starts, ordered, original = self._starts, self._ordered, self._blob
+        position = 0
+        while True:
+            match = pattern.search(blob, position)
+            if match is None:
+                return
+            index = bisect.bisect_right(starts, match.start() + skip) - 1
+            end = starts[index + 1] - 1
+            if match.end() <= end and (exact is None or original.startswith(exact, match.start() + skip)):
+                yield ordered[index]
+                position = end
+            else:
+                # Ran into the next text, or differed in a separator
+                position = match.start() + 1
+
+    @staticmethod
+    def _tier(query, texts):
+        """Best tier at which one of the texts matches the query, or None"""
+        best = None
+        for text in texts:
+            if text.startswith(query):
+                return 3
+            if _at_word_start(query, text):
+                tier = 2
+            elif query in text:
+                tier = 1
+            elif _is_subsequence(query, text):
+                tier = 0
+            else:
+                continue
+            best = tier if best is None else max(best, tier)
+        return best
+
+    def _changed(self):
+        self._blob = None
+        self._words = None
+        self._starts = None
+        self._last = None
+
+    @staticmethod
+    def _texts(texts):
+        # Newlines separate the texts in the joined string
+        return tuple(dict.fromkeys(text.casefold().replace("\n", " ") for text in texts if text))
+
+    def _add(self, target, texts, keep_order=True):
+        texts = self._texts(texts)
+        self._text_of[target] = texts
+        for text in texts:
+            targets = self._targets.get(text)
+            if targets is None:
+                targets = self._targets[text] = {}
+                if keep_order:
+                    self._ordered.insert(bisect.bisect_right(_Ranks(self._ordered), _rank(text)), text)
+                else:
+                    self._ordered.append(text)
+                self._changed()
+            targets[target] = None
+
+    def _discard(self, target):
+        texts = self._text_of.pop(target, None)
+        if texts is None:
+            return
+        for text in texts:
+            targets = self._targets[text]
+            del targets[target]
+            if not targets:
+                del self._targets[text]
+                del self._ordered[bisect.bisect_left(_Ranks(self._ordered), _rank(text))]
+                self._changed()
+
+    def _update(self, target, texts):
+        if self._text_of.get(target) != self._texts(texts):
+            self._discard(target)
+            self._add(target, texts)
+
+    def _add_account(self, account, keep_order=True):
+        self._add(account, (account.name, account.username), keep_order)
+        for game in account.games:
+            self._add(game, (game.name,), keep_order)
+
+    def accounts_inserted(self, first, last):
+        for account in self.registry.accounts[first:last + 1]:
+            self._add_account(account)
+
+    def accounts_removed(self, first, last, accounts):
+        for account in accounts:
+            self._discard(account)
+            for game in account.games:
+                self._discard(game)
+
+    def account_changed(self, account):
+        self._update(account, (account.name, account.username))
+
+    def games_inserted(self, account, first, last):
+        for game in account.games[first:last + 1]:
+            self._add(game, (game.name,))
+
+    def games_removed(self, account, first, last, games):
+        for game in games:
+            self._discard(game)
+
+    def games_reset(self, account):
+        for target in list(self._text_of):
+            if isinstance(target, Game) and self.registry.game(target.id) is not target:
+                self._discard(target)
+        for game in account.games:
+            self._add(game, (game.name,))
+
+    def game_changed(self, game):
+        self._update(game, (game.name,))
+
+
+class CommandPalette(QDialog):
+    """Keyboard-driven quick launcher over a PaletteIndex.
+
+    Enter runs the default command of the highlighted result (launch a game,
+    switch to an account, run an action); Shift+Enter edits it instead.
+    """
+
+    LIMIT = 20
+
+    def __init__(self, index, activate, parent=None):
+        super().__init__(parent, Qt.Popup)
+        self.index = index
+        # activate(target, edit) runs the command for a result
+        self.activate = activate
+        self.setMinimumWidth(500)
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("Launch a game, switch account, or run a command...")
+        self.query_edit.textChanged.connect(self.update_results)
+        self.query_edit.installEventFilter(self)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(lambda item: self.run(item, False))
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.query_edit)
+        layout.addWidget(self.results)
+        self.setLayout(layout)
+
+    def open_palette(self):
+        # Join the texts now rather than on the first keystroke
+        self.index.prepare()
+        self.query_edit.clear()
+        self.update_results()
+        parent = self.parentWidget()
+        if parent is not None:
+            self.move(parent.geometry().center().x() - self.width() // 2, parent.geometry().top() + 80)
+        self.show()
+        self.query_edit.setFocus()
+
+    def update_results(self):
+        self.results.clear()
+        for target in self.index.search(self.query_edit.text(), self.LIMIT):
+            item = QListWidgetItem(self.describe(target))
+            item.setData(Qt.UserRole, target)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    @staticmethod
+    def describe(target):
+        if isinstance(target, PaletteAction):
+            return target.label
+        if isinstance(target, Game):
+            account = target._owner
+            return f"Launch {target.name}  —  {account.name}" if account is not None else f"Launch {target.name}"
+        return f"Switch to {target.name} ({target.username})"
+
+    def run(self, item, edit):
+        if item is None:
+            return
+        self.hide()
+        self.activate(item.data(Qt.UserRole), edit)
+
+    def eventFilter(self, obj, event):
+        # Arrow keys move through the results while the query keeps the focus
+        if obj is self.query_edit and event.type() == event.KeyPress:
+            key = event.key()
+            if key in (Qt.Key_Up, Qt.Key_Down):
+                row = self.results.currentRow() + (1 if key == Qt.Key_Down else -1)
+                if 0 <= row < self.results.count():
+                    self.results.setCurrentRow(row)
+                return True
+            if key in (Qt.Key_Return, Qt.Key_Enter):
+                self.run(self.results.currentItem(), bool(event.modifiers() & Qt.ShiftModifier))
+                return True
+        return super().eventFilter(obj, event)
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import psutil
+
+# Process names of the Steam client; on Linux the steam launcher script shows up as "steam" too
+STEAM_PROCESS_NAMES = {"steam", "steam.exe"}
+
+
+def exited(processes):
+    """Whether every process has exited; a zombie has, even while its parent has not reaped it"""
+    for process in processes:
+        try:
+            if process.status() != psutil.STATUS_ZOMBIE:
+                return False
+        except psutil.NoSuchProcess:
+            continue
+    return True
+
+
+def wait_exit(processes, timeout, interval=0.05, backoff=1.5, max_interval=0.5):
+    """Wait up to `timeout` seconds for the processes to exit; return the ones still running.
+
+    psutil.wait_procs reaps our own children as they exit, but a zombie whose
+    parent is not us only disappears once its parent reaps it, so the wait is
+    cut into slices and zombies are counted as exited in between.
+    """
+    alive = list(processes)
+    deadline = time.monotonic() + timeout
+    while alive:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        _, alive = psutil.wait_procs(alive, timeout=min(interval, remaining))
+        alive = [process for process in alive if not exited((process,))]
+        interval = min(interval * backoff, max_interval)
+    return alive
+
+
+class ProcessMonitor:
+    """Process-wide view of the running Steam clients, built with psutil.
+
+    One scan of the process table answers every query until it is `max_age`
+    seconds old, so the launcher threads and the UI can ask as often as they
+    like without each call walking /proc or spawning tasklist or ps. Steam
+    clients are matched by exact process name, so other programs that merely
+    mention "steam" on their command line are left alone.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_age=1.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._scanned = None
+        self._steam = []
+
+    @classmethod
+    def shared(cls):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def refresh(self):
+        """Scan the process table now"""
+        steam = [
+            process for process in psutil.process_iter(["name"], ad_value=None)
+            if (process.info["name"] or "").lower() in STEAM_PROCESS_NAMES
+        ]
+        with self._lock:
+            self._steam = steam
+            self._scanned = time.monotonic()
+
+    def _current(self):
+        scanned = self._scanned
+        if scanned is None or time.monotonic() - scanned > self.max_age:
+            self.refresh()
+
+    def steam_processes(self, fresh=False):
+        """Running Steam client processes; `fresh` scans again rather than use the last scan"""
+        if fresh:
+            self.refresh()
+        else:
+            self._current()
+        return [process for process in self._steam if process.is_running() and not exited((process,))]
+
+    def steam_running(self, fresh=False):
+        return bool(self.steam_processes(fresh))
+
+    def steam_started_since(self, since):
+        """Whether a Steam client that started at or after the time `since` is running"""
+        for process in self.steam_processes(fresh=True):
+            try:
+                # create_time has a coarser clock than time.time() on some systems
+                if process.create_time() >= since - 1:
+                    return True
+            except psutil.Error:
+                continue
+        return False
+
+    def terminate(self, processes, timeout=5.0, kill_timeout=2.0):
+        """Ask the processes to exit, kill those still running after `timeout`; return any that survived"""
+        processes = list(processes)
+        for process in processes:
+            try:
+                process.terminate()
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied as e:
+                print(f"Cannot stop process {process.pid}: {e}")
+        alive = wait_exit(processes, timeout)
+        if alive:
+            for process in alive:
+                try:
+                    process.kill()
+                except psutil.Error:
+                    pass
+            alive = wait_exit(alive, kill_timeout)
+        self._scanned = None
+        return alive
+
+    def terminate_steam(self, timeout=5.0):
+        """Stop every running Steam client; return the processes that survived"""
+        return self.terminate(self.steam_processes(fresh=True), timeout)
@@ -0,0 +1,145 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class VaultRegistry(QObject):
+    """The vault's accounts plus indexes over them that stay current as the vault changes.
+
+    Accounts are added, removed and reordered through the registry. Games keep
+    being edited through their account's games list and their attributes; those
+    changes report back here, so lookups by id or app ID are dictionary hits
+    instead of scans over every account.
+
+    Every change is also announced through the signals below, with the range
+    of positions it affected, so views can update just the rows involved.
+    """
+
+    accounts_reset = pyqtSignal()
+    accounts_inserted = pyqtSignal(int, int)
+    accounts_removed = pyqtSignal(int, int, list)
+    account_changed = pyqtSignal(object)
+    games_reset = pyqtSignal(object)
+    games_inserted = pyqtSignal(object, int, int)
+    games_removed = pyqtSignal(object, int, int, list)
+    game_changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.accounts = []
+        self._accounts = {}
+        self._positions = None
+        self._games = {}
+        self._by_app_id = {}
+        self._app_id_of = {}
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def __iter__(self):
+        return iter(self.accounts)
+
+    def set_accounts(self, accounts):
+        """Replace the whole vault, e.g. after loading it"""
+        for account in self.accounts:
+            account._registry = None
+        self.accounts.clear()
+        self._accounts.clear()
+        self._games.clear()
+        self._by_app_id.clear()
+        self._app_id_of.clear()
+        for account in accounts:
+            self._attach(account)
+            self.accounts.append(account)
+        self._positions = None
+        self.accounts_reset.emit()
+
+    def add_account(self, account):
+        self._attach(account)
+        self.accounts.append(account)
+        position = len(self.accounts) - 1
+        if self._positions is not None:
+            self._positions[account.id] = position
+        self.accounts_inserted.emit(position, position)
+
+    def remove_account(self, account):
+        position = self.account_index(account)
+        del self.accounts[position]
+        del self._accounts[account.id]
+        for game in account.games:
+            self._game_removed(game)
+        account._registry = None
+        self._positions = None
+        self.accounts_removed.emit(position, position, [account])
+
+    def account(self, account_id):
+        return self._accounts.get(account_id)
+
+    def account_index(self, account):
+        """Position of the account in the vault order"""
+        if self._positions is None:
+            self._positions = {account.id: index for index, account in enumerate(self.accounts)}
+        return self._positions[account.id]
+
+    def game(self, game_id):
+        return self._games.get(game_id)
+
+    def account_of(self, game):
+        """The account owning the game"""
+        owner = game._owner
+        return owner if owner is not None and owner._registry is self else None
+
+    def games_of(self, account_id):
+        account = self._accounts.get(account_id)
+        return list(account.games) if account else []
+
+    def games_with_app_id(self, app_id):
+        return list(self._by_app_id.get(app_id, {}).values())
+
+    def accounts_with_app_id(self, app_id):
+        """Accounts owning at least one game with this app ID, in vault order"""
+        owners = {id(game._owner): game._owner for game in self._by_app_id.get(app_id, {}).values()}
+        return sorted(owners.values(), key=self.account_index)
+
+    def all_games(self):
+        """Every (account, game) pair in vault order"""
+        for account in self.accounts:
+            for game in account.games:
+                yield account, game
+
+    def _attach(self, account):
+        account._registry = self
+        self._accounts[account.id] = account
+        for game in account.games:
+            self._game_added(game)
+
+    def _game_added(self, game):
+        self._games[game.id] = game
+        app_id = game.app_id
+        self._by_app_id.setdefault(app_id, {})[game.id] = game
+        self._app_id_of[game.id] = app_id
+
+    def _game_removed(self, game):
+        self._games.pop(game.id, None)
+        app_id = self._app_id_of.pop(game.id, None)
+        bucket = self._by_app_id.get(app_id)
+        if bucket is not None:
+            bucket.pop(game.id, None)
+            if not bucket:
+                del self._by_app_id[app_id]
+
+    def _game_changed(self, game):
+        if self._app_id_of.get(game.id) != game.app_id:
+            self._game_removed(game)
+            self._game_added(game)
+        self.game_changed.emit(game)
+
+    def _account_changed(self, account):
+        self.account_changed.emit(account)
+
+    def _games_inserted(self, account, first, last):
+        self.games_inserted.emit(account, first, last)
+
+    def _games_removed(self, account, first, last, games):
+        self.games_removed.emit(account, first, last, games)
+
+    def _games_reset(self, account):
+        self.games_reset.emit(account)
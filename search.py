@@ -0,0 +1,432 @@
+import itertools
+import operator
+import sys
+import threading
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+_EMPTY = frozenset()
+_owner_of = operator.attrgetter("_owner")
+
+
+class _Document:
+    """The casefolded field values shared by every object that has them.
+
+    Hashed by identity, so sets of documents are cheap to probe.
+    """
+    __slots__ = ("texts", "members")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.members = set()
+
+
+class SearchIndex:
+    """Case-insensitive substring search over a few text fields of many objects.
+
+    Field values are casefolded once when an object is added or edited, and
+    objects with the same values share one document. Each distinct text is
+    indexed by its trigrams, so a query only verifies the texts sharing all
+    of its trigrams, and a query extending the previous one only re-checks
+    the texts that matched before.
+    """
+
+    GRAM = 3
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.version = 0
+        self._docs = {}
+        self._by_texts = {}
+        self._text_docs = {}
+        self._grams = {}
+        self._last = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def objects(self):
+        return list(self._docs)
+
+    def add(self, obj):
+        self.version += 1
+        texts = tuple(sys.intern(getattr(obj, field).casefold()) for field in self.fields)
+        previous = self._docs.get(obj)
+        if previous is not None:
+            if previous.texts == texts:
+                return
+            self.discard(obj)
+
+        doc = self._by_texts.get(texts)
+        if doc is None:
+            doc = self._by_texts[texts] = _Document(texts)
+            for text in set(texts):
+                docs = self._text_docs.get(text)
+                if docs is None:
+                    docs = self._text_docs[text] = set()
+                    for gram in self._grams_of(text):
+                        self._grams.setdefault(gram, set()).add(text)
+                docs.add(doc)
+            self._last = None
+        doc.members.add(obj)
+        self._docs[obj] = doc
+
+    update = add
+
+    def discard(self, obj):
+        doc = self._docs.pop(obj, None)
+        if doc is None:
+            return
+        self.version += 1
+        doc.members.discard(obj)
+        if doc.members:
+            return
+
+        del self._by_texts[doc.texts]
+        for text in set(doc.texts):
+            docs = self._text_docs[text]
+            docs.discard(doc)
+            if not docs:
+                del self._text_docs[text]
+                for gram in self._grams_of(text):
+                    texts = self._grams[gram]
+                    texts.discard(text)
+                    if not texts:
+                        del self._grams[gram]
+        self._last = None
+
+    def clear(self):
+        self.version += 1
+        self._docs.clear()
+        self._by_texts.clear()
+        self._text_docs.clear()
+        self._grams.clear()
+        self._last = None
+
+    def matches(self, obj, query):
+        """True if one of the object's fields contains the casefolded query"""
+        doc = self._docs.get(obj)
+        return doc is not None and any(query in text for text in doc.texts)
+
+    def docs_of(self, objects):
+        return map(self._docs.get, objects)
+
+    def matching_docs(self, query):
+        text_docs = self._text_docs
+        return set().union(*(text_docs[text] for text in self.matching_texts(query)))
+
+    def covers_all(self, docs):
+        """True if the documents matched by a query are all the documents there are"""
+        return len(docs) == len(self._by_texts)
+
+    @staticmethod
+    def count(docs):
+        """Number of objects carrying one of the documents"""
+        return sum(len(doc.members) for doc in docs)
+
+    @staticmethod
+    def members(docs):
+        """The objects carrying one of the documents"""
+        return set().union(*(doc.members for doc in docs))
+
+    def matching_texts(self, query):
+        # Queries may run on a worker thread; a cached answer is only reused
+        # if nothing was indexed since it was computed
+        version = self.version
+        last = self._last
+        if last is not None and last[2] == version and last[0] in query:
+            # The query only got longer, so the answer is within the previous one
+            candidates = last[1]
+        elif len(query) >= self.GRAM:
+            postings = sorted((self._grams.get(gram, _EMPTY) for gram in self._grams_of(query)), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = self._text_docs
+        texts = [text for text in candidates if query in text]
+        self._last = (query, texts, version)
+        return texts
+
+    def _grams_of(self, text):
+        gram = self.GRAM
+        return {text[i:i + gram] for i in range(len(text) - gram + 1)}
+
+
+class _Alignment:
+    """Per-position data about one list of objects, rebuilt only when the list or the index changes"""
+    __slots__ = ("objects", "version", "length", "positions", "docs", "owners")
+
+    def __init__(self, objects, version):
+        self.objects = objects
+        self.version = version
+        self.length = len(objects)
+        self.positions = None
+        self.docs = None
+        self.owners = None
+
+    def valid_for(self, objects, version):
+        return self.objects is objects and self.version == version and self.length == len(objects)
+
+
+class VaultSearch:
+    """Search indexes over a VaultRegistry's accounts and games, kept current from its signals.
+
+    Create it before any model that filters with it, so the indexes have seen
+    an edit by the time the models re-check the edited row.
+    """
+
+    # Results smaller than 1/SPARSE_RATIO of the list are collected from the index
+    SPARSE_RATIO = 8
+    CHUNK = 16384
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.games = SearchIndex(("name", "app_id"))
+        self.accounts = SearchIndex(("name", "username"))
+        self.account_names = SearchIndex(("name",))
+        self._games_alignment = None
+
+        registry.accounts_reset.connect(self.rebuild)
+        registry.accounts_inserted.connect(self.accounts_inserted)
+        registry.accounts_removed.connect(self.accounts_removed)
+        registry.account_changed.connect(self.account_changed)
+        registry.games_reset.connect(self.games_reset)
+        registry.games_inserted.connect(self.games_inserted)
+        registry.games_removed.connect(self.games_removed)
+        registry.game_changed.connect(self.games.update)
+        self.rebuild()
+
+    @staticmethod
+    def normalize(text):
+        return text.casefold()
+
+    def rebuild(self):
+        self.games.clear()
+        self.accounts.clear()
+        self.account_names.clear()
+        for account in self.registry.accounts:
+            self._add_account(account)
+
+    def account_matches(self, account, query):
+        """True if the account's name or username contains the normalized query"""
+        return self.accounts.matches(account, query)
+
+    def select_accounts(self, accounts, query, cancelled=None):
+        """The accounts of the list matching the normalized query, in list order"""
+        docs = self.accounts.matching_docs(query)
+        if cancelled is not None and cancelled():
+            return None
+        return list(itertools.compress(accounts, map(docs.__contains__, self.accounts.docs_of(accounts))))
+
+    def game_matches(self, game, query, include_account_names=False):
+        """True if the game's name or app ID, or optionally its account's name, contains the normalized query"""
+        return self.games.matches(game, query) or (
+            include_account_names and self.account_names.matches(game._owner, query)
+        )
+
+    def select_games(self, games, query, include_account_names=False, cancelled=None):
+        """The games of the list matching the normalized query, in list order.
+
+        Small results are collected from the index and put in list order with
+        a cached position map; large ones are picked out by a pass in C over
+        cached per-position documents. Returns None if `cancelled()` turns
+        true before the pass is done.
+        """
+        index = self.games
+        docs = index.matching_docs(query)
+        accounts = self.account_names.members(self.account_names.matching_docs(query)) if include_account_names else ()
+        if index.covers_all(docs):
+            return list(games)
+
+        alignment = self._alignment(games)
+        estimate = index.count(docs) + sum(len(account.games) for account in accounts)
+        if estimate * self.SPARSE_RATIO < len(games):
+            matches = index.members(docs)
+            for account in accounts:
+                matches.update(account.games)
+            if alignment.positions is None:
+                alignment.positions = dict(zip(games, range(len(games))))
+            positions = alignment.positions
+            return sorted((game for game in matches if game in positions), key=positions.__getitem__)
+
+        if alignment.docs is None:
+            alignment.docs = list(index.docs_of(games))
+        if accounts and alignment.owners is None:
+            alignment.owners = list(map(_owner_of, games))
+
+        # Done in chunks so a superseded query stops early and other threads get the GIL
+        rows = []
+        for start in range(0, len(games), self.CHUNK):
+            if cancelled is not None and cancelled():
+                return None
+            end = start + self.CHUNK
+            mask = map(docs.__contains__, alignment.docs[start:end])
+            if accounts:
+                mask = map(operator.or_, mask, map(accounts.__contains__, alignment.owners[start:end]))
+            rows.extend(itertools.compress(games[start:end], mask))
+        return rows
+
+    def _alignment(self, games):
+        alignment = self._games_alignment
+        version = self.games.version
+        if alignment is None or not alignment.valid_for(games, version):
+            alignment = self._games_alignment = _Alignment(games, version)
+        return alignment
+
+    def accounts_inserted(self, first, last):
+        for account in self.registry.accounts[first:last + 1]:
+            self._add_account(account)
+
+    def accounts_removed(self, first, last, accounts):
+        for account in accounts:
+            self.accounts.discard(account)
+            self.account_names.discard(account)
+            for game in account.games:
+                self.games.discard(game)
+
+    def account_changed(self, account):
+        self.accounts.update(account)
+        self.account_names.update(account)
+
+    def games_inserted(self, account, first, last):
+        for game in account.games[first:last + 1]:
+            self.games.add(game)
+
+    def games_removed(self, account, first, last, games):
+        for game in games:
+            self.games.discard(game)
+
+    def games_reset(self, account):
+        for game in self.games.objects():
+            if self.registry.game(game.id) is not game:
+                self.games.discard(game)
+        for game in account.games:
+            self.games.add(game)
+
+    def _add_account(self, account):
+        self.accounts.add(account)
+        self.account_names.add(account)
+        for game in account.games:
+            self.games.add(game)
+
+
+class FilterWorker(QThread):
+    """Runs filter queries on a worker thread, always skipping to the newest one.
+
+    A submitted query supersedes any query still waiting or running; a running
+    one sees `cancelled()` turn true and its result is dropped, so only the
+    latest result is ever posted back through `result_ready`.
+    """
+    result_ready = pyqtSignal(int, object)  # generation, rows (None if the vault changed meanwhile)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = None
+        self._generation = 0
+        self._running = True
+
+    def submit(self, job):
+        """Queue job(cancelled) to run on the worker and return its generation"""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, job)
+            self._condition.notify_all()
+            return self._generation
+
+    def cancel(self):
+        """Drop the waiting query and make the running one stop"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._generation += 1
+            self._condition.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running:
+                    return
+                generation, job = self._pending
+                self._pending = None
+
+            cancelled = lambda: generation != self._generation
+            try:
+                rows = job(cancelled)
+            except (RuntimeError, LookupError):
+                # An index changed under the query; the filter reruns it
+                rows = None
+            if not cancelled():
+                self.result_ready.emit(generation, rows)
+
+
+class LiveFilter(QObject):
+    """Filters a list model as the user types.
+
+    Keystrokes are debounced, matching runs on a FilterWorker, and a result is
+    only applied if it answers the latest text and the model did not change
+    while it was computed; otherwise the query runs again.
+    """
+
+    DELAY = 150  # ms of quiet typing before a query starts
+
+    def __init__(self, model, make_filter, parent=None):
+        super().__init__(parent)
+        self.model = model
+        # make_filter(query) returns (predicate, select) for the normalized
+        # query, or None if nothing is to be filtered out
+        self.make_filter = make_filter
+        self._text = ""
+        self._pending = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DELAY)
+        self._timer.timeout.connect(self.run)
+
+        self.worker = FilterWorker(self)
+        self.worker.result_ready.connect(self._result_ready)
+        self.worker.start()
+
+    def set_text(self, text):
+        self._text = text
+        self._timer.start()
+
+    def run(self):
+        """Start the query for the current text now"""
+        self._timer.stop()
+        spec = self.make_filter(VaultSearch.normalize(self._text))
+        if spec is None:
+            self.worker.cancel()
+            self._pending = None
+            self.model.set_filter(None)
+            return
+
+        predicate, select = spec
+        objects, revision = self.model.objects(), self.model.revision
+        generation = self.worker.submit(lambda cancelled: select(objects, cancelled))
+        self._pending = (generation, predicate, select, revision)
+
+    @property
+    def busy(self):
+        return self._pending is not None or self._timer.isActive()
+
+    def stop(self):
+        self._timer.stop()
+        self.worker.stop()
+
+    def _result_ready(self, generation, rows):
+        pending = self._pending
+        if pending is None or pending[0] != generation:
+            return
+        _, predicate, select, revision = pending
+        if rows is None or self.model.revision != revision:
+            self.run()
+            return
+        self._pending = None
+        self.model.apply_filter(predicate, rows, select)
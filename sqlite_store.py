@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import threading
+
+from account import SteamAccount
+from game import Game
+from storage import JournalStore, write_config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL DEFAULT '',
+    password_hint TEXT NOT NULL DEFAULT '',
+    auto_login INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS games (
+    account_id TEXT NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    app_id TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL DEFAULT '',
+    icon_path TEXT NOT NULL DEFAULT '',
+    is_steam_game INTEGER NOT NULL DEFAULT 1,
+    tags TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_name ON accounts(name);
+CREATE INDEX IF NOT EXISTS idx_accounts_username ON accounts(username);
+CREATE INDEX IF NOT EXISTS idx_games_app_id ON games(app_id);
+CREATE INDEX IF NOT EXISTS idx_games_account ON games(account_id, position);
+"""
+
+GAME_COLUMNS = "name, app_id, path, icon_path, is_steam_game, tags"
+
+
+def _row_size(values):
+    """Bytes of data in a row, counting integers as SQLite's 8 bytes"""
+    return sum(len(value.encode()) if isinstance(value, str) else 8 for value in values)
+
+
+class SqliteStore:
+    """Vault storage in a SQLite database, with the same load/save interface as JournalStore.
+
+    Passwords are stored encrypted, exactly as in the JSON config. Saves only
+    rewrite the rows of changed accounts, and lookups by account name, username
+    or game app ID are answered from indexes.
+    """
+
+    def __init__(self, path, encryption_handler):
+        self.path = path
+        self.encryption_handler = encryption_handler
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(SCHEMA)
+        # Databases created before games had tags
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(games)")}
+        if "tags" not in columns:
+            self._conn.execute("ALTER TABLE games ADD COLUMN tags TEXT NOT NULL DEFAULT ''")
+
+        self._steam_path = ""
+        self._order = []
+        self._revisions = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def load(self):
+        """Read the whole vault, returning (steam_path, accounts)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM settings WHERE key = 'steam_path'").fetchone()
+            steam_path = row[0] if row else ""
+
+            accounts = {}
+            for account_id, name, username, password, password_hint, auto_login in self._conn.execute(
+                    "SELECT id, name, username, password, password_hint, auto_login FROM accounts ORDER BY position"):
+                accounts[account_id] = SteamAccount.from_dict({
+                    "id": account_id,
+                    "name": name,
+                    "username": username,
+                    "password": password,
+                    "password_hint": password_hint,
+                    "auto_login": bool(auto_login)
+                }, self.encryption_handler)
+
+            for row in self._conn.execute(f"SELECT account_id, {GAME_COLUMNS} FROM games ORDER BY account_id, position"):
+                accounts[row[0]].games.append(self._game_from_row(row[1:]))
+
+        accounts = list(accounts.values())
+        self._remember(steam_path, accounts)
+        return steam_path, accounts
+
+    def _remember(self, steam_path, accounts, revisions=None):
+        self._steam_path = steam_path
+        self._order = [account.id for account in accounts]
+        self._revisions = revisions or {account.id: account._revision for account in accounts}
+
+    def _game_from_row(self, row):
+        name, app_id, path, icon_path, is_steam_game, tags = row
+        return Game(name, app_id, path, icon_path, bool(is_steam_game), tags.split(",") if tags else ())
+
+    def save(self, steam_path, accounts):
+        """Write the accounts that changed since the last save, returning the bytes of row data written
+
+        All changes go into one transaction, which for a single edit touches
+        only that account's rows.
+        """
+        SteamAccount.encrypt_passwords(accounts, self.encryption_handler)
+        size = 0
+        revisions = {}
+
+        with self._lock, self._conn:
+            if steam_path != self._steam_path:
+                self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('steam_path', ?)", (steam_path,))
+                size += _row_size(("steam_path", steam_path))
+
+            for position, account in enumerate(accounts):
+                revision = account._revision
+                revisions[account.id] = revision
+                if self._revisions.get(account.id) != revision:
+                    size += self._write_account(account, position)
+
+            deleted = [(account_id,) for account_id in self._revisions if account_id not in revisions]
+            self._conn.executemany("DELETE FROM accounts WHERE id = ?", deleted)
+
+            # Rows keep their stored position unless renumbered, so anything but
+            # accounts added at the end renumbers them all
+            order = list(revisions)
+            if order[:len(self._order)] != self._order:
+                self._conn.executemany("UPDATE accounts SET position = ? WHERE id = ?",
+                                       [(position, account_id) for position, account_id in enumerate(order)])
+                size += 8 * len(order)
+
+        self._remember(steam_path, accounts, revisions)
+        return size
+
+    def _write_account(self, account, position):
+        data = account.to_dict(self.encryption_handler)
+        account_row = (data["id"], position, data["name"], data["username"], data["password"],
+                       data["password_hint"], int(data["auto_login"]))
+        game_rows = [(account.id, index, game.name, game.app_id, game.path, game.icon_path, int(game.is_steam_game),
+                      ",".join(sorted(game.tags)))
+                     for index, game in enumerate(account.games)]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO accounts (id, position, name, username, password, password_hint, auto_login) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            account_row
+        )
+        self._conn.execute("DELETE FROM games WHERE account_id = ?", (account.id,))
+        self._conn.executemany(
+            f"INSERT INTO games (account_id, position, {GAME_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            game_rows
+        )
+        return _row_size(account_row) + sum(_row_size(row) for row in game_rows)
+
+    def find_accounts_by_app_id(self, app_id):
+        """Return the ids of the accounts owning the given app"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT account_id FROM games WHERE app_id = ?", (app_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def find_accounts_by_name(self, name):
+        """Return the ids of the accounts with the given display name"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM accounts WHERE name = ?", (name,)).fetchall()
+        return [row[0] for row in rows]
+
+    def find_accounts_by_username(self, username):
+        """Return the ids of the accounts with the given Steam username"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM accounts WHERE username = ?", (username,)).fetchall()
+        return [row[0] for row in rows]
+
+    def load_games(self, account_id):
+        """Read only the games of one account"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {GAME_COLUMNS} FROM games WHERE account_id = ? ORDER BY position", (account_id,)
+            ).fetchall()
+        return [self._game_from_row(row) for row in rows]
+
+    def migrate_json(self, json_path):
+        """Import a JSON config file into an empty database, once.
+
+        Returns (steam_path, accounts), or None when the vault was already
+        migrated or started out in the database.
+        """
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM settings WHERE key = 'json_imported'").fetchone():
+                return None
+            if self._conn.execute("SELECT COUNT(*) FROM accounts").fetchone()[0] > 0 or not os.path.exists(json_path):
+                # Databases filled before the import was recorded
+                self._conn.execute("INSERT INTO settings (key, value) VALUES ('json_imported', '')")
+                return None
+        return self.import_json(json_path)
+
+    def import_json(self, json_path):
+        """Replace the database contents with a JSON config file"""
+        steam_path, accounts = JournalStore(json_path, self.encryption_handler).load()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM accounts")
+            self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('steam_path', ?)", (steam_path,))
+            self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('json_imported', ?)", (json_path,))
+            for position, account in enumerate(accounts):
+                self._write_account(account, position)
+        self._remember(steam_path, accounts)
+        return steam_path, accounts
+
+    def export_json(self, json_path):
+        """Write the database contents as a JSON config file, returning the bytes written"""
+        steam_path, accounts = self.load()
+        if os.path.exists(f"{json_path}.journal"):
+            os.remove(f"{json_path}.journal")
+        return write_config(json_path, steam_path, accounts, self.encryption_handler)
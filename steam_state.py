@@ -0,0 +1,209 @@
+import os
+import re
+import time
+
+import psutil
+
+try:
+    import winreg
+except ImportError:  # Not on Windows; Steam keeps its registry in registry.vdf instead
+    winreg = None
+
+# SteamID64 of the account with account ID 0; loginusers.vdf is keyed by SteamID64
+STEAM_ID_BASE = 76561197960265728
+
+
+def wait_until(check, timeout, cancelled=None, interval=0.05, backoff=1.5, max_interval=0.5, on_wait=None):
+    """Call check() until it returns something true and return that, or None after `timeout` seconds.
+
+    Checks start `interval` seconds apart, the gap growing by `backoff` up to
+    `max_interval`, so a quick answer is seen quickly without polling a slow
+    one at a high rate. on_wait(elapsed) is called between checks.
+    """
+    start = time.monotonic()
+    while True:
+        result = check()
+        if result:
+            return result
+        elapsed = time.monotonic() - start
+        if elapsed >= timeout or (cancelled is not None and cancelled()):
+            return None
+        if on_wait is not None:
+            on_wait(elapsed)
+        time.sleep(min(interval, timeout - elapsed))
+        interval = min(interval * backoff, max_interval)
+
+
+_VDF_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([{}])|//[^\n]*|\s+')
+
+
+def parse_vdf(text):
+    """Parse Valve's KeyValues text format, as in loginusers.vdf, into nested dicts"""
+    root = {}
+    stack = [root]
+    key = None
+    for match in _VDF_TOKEN.finditer(text):
+        string, brace = match.groups()
+        if brace == "{":
+            section = {}
+            stack[-1][key] = section
+            stack.append(section)
+            key = None
+        elif brace == "}":
+            if len(stack) > 1:
+                stack.pop()
+        elif string is not None:
+            string = re.sub(r"\\(.)", r"\1", string)
+            if key is None:
+                key = string
+            else:
+                stack[-1][key] = string
+                key = None
+    return root
+
+
+def _lookup(section, *path):
+    """Nested VDF value by case-insensitive keys, or None"""
+    for key in path:
+        if not isinstance(section, dict):
+            return None
+        key = key.lower()
+        section = next((value for name, value in section.items() if name.lower() == key), None)
+    return section
+
+
+def find_steam_dir(steam_path):
+    """Steam's data directory for the client at steam_path"""
+    candidates = [os.path.dirname(steam_path)]
+    if os.name != 'nt':
+        candidates += [os.path.expanduser("~/.steam/steam"), os.path.expanduser("~/.local/share/Steam")]
+    for candidate in candidates:
+        if os.path.isdir(os.path.join(candidate, "config")):
+            return candidate
+    return candidates[0]
+
+
+class SteamState:
+    """Steam's local state files, read to tell when a client has started and signed in.
+
+    config/loginusers.vdf lists the accounts that signed in on this machine
+    and when; the one Steam signed in last is marked MostRecent. Steam also
+    logs each logon to logs/connection_log.txt. Both are written by Steam
+    itself, so reading them stays correct however long the client takes.
+    While it runs, Steam records its pid and the signed-in account ID under
+    ActiveProcess in the registry, or in registry.vdf outside Windows.
+    """
+
+    # Lines Steam writes to connection_log.txt once an account is logged on
+    LOGON_PATTERN = re.compile(r"\[Logged On\]|SetSteamID\( \[U:1:[1-9]")
+
+    def __init__(self, steam_path, steam_dir=None, home=None):
+        self.steam_dir = steam_dir or find_steam_dir(steam_path)
+        home = home or os.path.expanduser("~")
+        self.loginusers_path = os.path.join(self.steam_dir, "config", "loginusers.vdf")
+        self.log_path = os.path.join(self.steam_dir, "logs", "connection_log.txt")
+        self.registry_paths = [os.path.join(self.steam_dir, "registry.vdf"), os.path.join(home, ".steam", "registry.vdf")]
+
+    def loginusers(self):
+        """The users section of loginusers.vdf, by SteamID; empty if it cannot be read"""
+        try:
+            with open(self.loginusers_path, encoding="utf-8", errors="replace") as f:
+                users = parse_vdf(f.read()).get("users", {})
+        except OSError:
+            return {}
+        return {steam_id: user for steam_id, user in users.items() if isinstance(user, dict)}
+
+    def signed_in_since(self, username, since):
+        """Whether Steam last signed in as username, at or after the time `since`"""
+        # Timestamps are in whole seconds, so a sign-in just before `since` could pass for one after it
+        try:
+            if os.path.getmtime(self.loginusers_path) < since:
+                return False
+        except OSError:
+            return False
+        username = username.casefold()
+        for user in self.loginusers().values():
+            if user.get("AccountName", "").casefold() != username or user.get("MostRecent") != "1":
+                continue
+            try:
+                return int(user.get("Timestamp", "0")) >= int(since)
+            except ValueError:
+                return False
+        return False
+
+    def log_offset(self):
+        """Current end of the connection log, to look for logons written after it"""
+        try:
+            return os.path.getsize(self.log_path)
+        except OSError:
+            return 0
+
+    def logged_on_since(self, offset):
+        """Whether the connection log records a logon after the given offset"""
+        try:
+            with open(self.log_path, "rb") as f:
+                # Steam starts a new log when it starts, which can be shorter
+                if os.fstat(f.fileno()).st_size >= offset:
+                    f.seek(offset)
+                written = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            return False
+        return self.LOGON_PATTERN.search(written) is not None
+
+    def active_process(self):
+        """Steam's ActiveProcess values (pid and ActiveUser), or an empty dict"""
+        if os.name == 'nt' and winreg is not None:
+            values = {}
+            try:
+                key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam\ActiveProcess")
+                for name in ("pid", "ActiveUser"):
+                    values[name] = str(winreg.QueryValueEx(key, name)[0])
+                winreg.CloseKey(key)
+            except OSError:
+                pass
+            return values
+
+        for path in self.registry_paths:
+            try:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    registry = parse_vdf(f.read())
+            except OSError:
+                continue
+            active = _lookup(registry, "Registry", "HKCU", "Software", "Valve", "Steam", "ActiveProcess")
+            if isinstance(active, dict):
+                return {name: _lookup(active, name) for name in ("pid", "ActiveUser") if _lookup(active, name) is not None}
+        return {}
+
+    def account_name(self, account_id):
+        """The account name loginusers.vdf has for an account ID, or None"""
+        user = self.loginusers().get(str(STEAM_ID_BASE + account_id))
+        return user.get("AccountName") if user is not None else None
+
+    def signed_in_account(self, processes):
+        """The account name the running Steam client is signed in as, or None if unknown or signed out.
+
+        `processes` are the running Steam client processes. ActiveProcess
+        answers when its pid is one of them; otherwise the -login argument
+        the client was started with does.
+        """
+        if not processes:
+            return None
+        pids = {str(process.pid) for process in processes}
+        active = self.active_process()
+        if active.get("pid") in pids:
+            value = active.get("ActiveUser", "0")
+            try:
+                account_id = int(value, 16) if value.lower().startswith("0x") else int(value)
+            except ValueError:
+                account_id = 0
+            # 0 while the client is still signing in, or signed out
+            return self.account_name(account_id) if account_id else None
+
+        for process in processes:
+            try:
+                arguments = process.cmdline()
+            except psutil.Error:
+                continue
+            if "-login" in arguments[:-1]:
+                return arguments[arguments.index("-login") + 1]
+        return None
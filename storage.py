@@ -0,0 +1,325 @@
+import json
+import os
+import threading
+import time
+
+from PyQt5.QtCore import *
+
+from account import SteamAccount
+from catalog import GameCatalog
+
+
+def catalog_keys_in_use(accounts):
+    """Catalog keys the accounts' games refer to, in the order they first appear"""
+    return list(dict.fromkeys(game.catalog_key for account in accounts for game in account.games))
+
+
+def write_config(path, steam_path, accounts, encryption_handler, generation=None):
+    """Serialize the vault and atomically replace the config file, returning the bytes written
+
+    Each account is written on its own line from its cached JSON, so only
+    accounts that changed since the last save are re-encrypted and re-encoded.
+    Games refer to the shared catalog, of which only the entries they refer
+    to are written. A journaled snapshot also records its generation.
+    """
+    SteamAccount.encrypt_passwords(accounts, encryption_handler)
+    fragments = [account.to_json(encryption_handler) for account in accounts]
+    accounts_json = "[\n    " + ",\n    ".join(fragments) + "\n  ]" if fragments else "[]"
+    entries = GameCatalog.shared().to_json(catalog_keys_in_use(accounts))
+    catalog_json = "{\n    " + ",\n    ".join(entries) + "\n  }" if entries else "{}"
+    header = f'  "generation": {generation},\n' if generation is not None else ""
+    data = (f'{{\n{header}  "steam_path": {json.dumps(steam_path)},\n  "accounts": {accounts_json},\n'
+            f'  "catalog": {catalog_json}\n}}\n').encode()
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class JournalStore:
+    """Vault storage made of a snapshot file plus an append-only journal of changes.
+
+    The snapshot keeps the original config format, so an existing config file is
+    picked up as-is. Each save appends one record per changed account instead of
+    rewriting the whole vault; once the journal outgrows the snapshot it is
+    compacted into a fresh snapshot. Each compaction numbers the snapshot with
+    a new generation and the journal starts with the generation it extends, so
+    a journal left behind by a crash during compaction is recognized as stale
+    and not replayed over the newer snapshot.
+    """
+
+    def __init__(self, path, encryption_handler, min_compact_size=64 * 1024):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.encryption_handler = encryption_handler
+        self.min_compact_size = min_compact_size
+
+        self.snapshot_size = 0
+        self.journal_size = 0
+        self._steam_path = ""
+        self._order = []
+        self._revisions = {}
+        self._catalog_keys = set()
+        self._generation = 0
+        self._needs_compaction = False
+
+    def load(self):
+        """Read the snapshot and replay the journal, returning (steam_path, accounts)"""
+        config = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                config = json.load(f)
+            self.snapshot_size = os.path.getsize(self.path)
+        else:
+            # Start a new vault with a snapshot so the config file always exists
+            self._needs_compaction = True
+
+        # Snapshots written before generations were numbered count as generation 0
+        self._generation = config.get("generation", 0)
+        catalog = GameCatalog.shared()
+        catalog.load(config.get("catalog", {}))
+        self._catalog_keys = set(config.get("catalog", {}))
+
+        steam_path = config.get("steam_path", "")
+        accounts = {}
+        legacy = False
+        for account_data in config.get("accounts", []):
+            if "id" not in account_data:
+                # Config written before the journal existed; ids are assigned now
+                # and persisted by compacting on the first save
+                legacy = self._needs_compaction = True
+            account = SteamAccount.from_dict(account_data, self.encryption_handler)
+            accounts[account.id] = account
+        order = list(accounts)
+
+        if os.path.exists(self.journal_path) and legacy:
+            print("Ignoring config journal that does not match the config file")
+        elif os.path.exists(self.journal_path):
+            with open(self.journal_path, 'rb') as f:
+                journal = f.read()
+
+            # Drop a partially written record left by an interrupted save so
+            # the next append starts on a fresh line
+            complete = journal.rfind(b"\n") + 1
+            if complete < len(journal):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(complete)
+
+            records = []
+            for line in journal[:complete].splitlines():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+            # Journals written before generations were numbered have no header
+            generation = records[0]["value"] if records and records[0].get("op") == "generation" else 0
+            if records and generation != self._generation:
+                # Left behind by a compaction that was interrupted after writing the snapshot
+                print("Ignoring config journal from before the last compaction")
+                with open(self.journal_path, 'wb'):
+                    pass
+                complete = 0
+                records = []
+            for record in records:
+                steam_path = self._replay(record, steam_path, accounts, order)
+            self.journal_size = complete
+
+        accounts = [accounts[account_id] for account_id in order]
+        catalog.prune(set(catalog_keys_in_use(accounts)))
+        # Pruned entries are no longer on record; one that comes back must be written again
+        self._catalog_keys.intersection_update(catalog.keys())
+        self._remember(steam_path, accounts)
+        return steam_path, accounts
+
+    def _replay(self, record, steam_path, accounts, order):
+        op = record.get("op")
+        if op == "steam_path":
+            return record["value"]
+
+        if op == "catalog":
+            GameCatalog.shared().load({record["key"]: record["entry"]})
+            self._catalog_keys.add(record["key"])
+        elif op == "put":
+            account = SteamAccount.from_dict(record["account"], self.encryption_handler)
+            if account.id not in accounts:
+                order.append(account.id)
+            accounts[account.id] = account
+        elif op == "delete" and record["id"] in accounts:
+            del accounts[record["id"]]
+            order.remove(record["id"])
+        elif op == "order":
+            known = [account_id for account_id in record["ids"] if account_id in accounts]
+            listed = set(known)
+            order[:] = known + [account_id for account_id in order if account_id not in listed]
+        return steam_path
+
+    def _remember(self, steam_path, accounts, revisions=None):
+        self._steam_path = steam_path
+        self._order = [account.id for account in accounts]
+        self._revisions = revisions or {account.id: account._revision for account in accounts}
+
+    def save(self, steam_path, accounts):
+        """Persist the changes since the last save, returning the bytes written"""
+        if self._needs_compaction or self.journal_size > max(self.snapshot_size, self.min_compact_size):
+            return self.compact(steam_path, accounts)
+
+        SteamAccount.encrypt_passwords(accounts, self.encryption_handler)
+        records = []
+        revisions = {}
+        if steam_path != self._steam_path:
+            records.append(json.dumps({"op": "steam_path", "value": steam_path}))
+
+        for account in accounts:
+            revision = account._revision
+            revisions[account.id] = revision
+            if self._revisions.get(account.id) != revision:
+                records.append(f'{{"op": "put", "id": {json.dumps(account.id)}, "account": {account.to_json(self.encryption_handler)}}}')
+
+        # Collected after the accounts, so every title those records refer to is
+        # covered; the keys are compared rather than counted, as the catalog can
+        # hold entries that are not on record
+        catalog = GameCatalog.shared()
+        new_keys = [key for key in catalog.keys() if key not in self._catalog_keys]
+        if new_keys:
+            records[:0] = [json.dumps({"op": "catalog", "key": key, "entry": catalog.get(key).to_dict()})
+                           for key in new_keys]
+            self._catalog_keys.update(new_keys)
+
+        for account_id in self._revisions:
+            if account_id not in revisions:
+                records.append(json.dumps({"op": "delete", "id": account_id}))
+
+        order = list(revisions)
+        if order != [account_id for account_id in self._order if account_id in revisions] + \
+                [account_id for account_id in order if account_id not in self._revisions]:
+            records.append(json.dumps({"op": "order", "ids": order}))
+
+        if not records:
+            return 0
+
+        if self.journal_size == 0:
+            # Tie a new journal to the snapshot it extends
+            records.insert(0, json.dumps({"op": "generation", "value": self._generation}))
+        data = ("\n".join(records) + "\n").encode()
+        with open(self.journal_path, 'ab') as f:
+            f.write(data)
+        self.journal_size += len(data)
+        self._remember(steam_path, accounts, revisions)
+        return len(data)
+
+    def compact(self, steam_path, accounts):
+        """Fold the journal into a fresh snapshot, returning the bytes written"""
+        revisions = {account.id: account._revision for account in accounts}
+        self._catalog_keys = set(catalog_keys_in_use(accounts))
+        generation = self._generation + 1
+        self.snapshot_size = write_config(self.path, steam_path, accounts, self.encryption_handler, generation)
+        self._generation = generation
+
+        # Should the truncation not happen, the journal's older generation
+        # keeps it from being replayed over this snapshot
+        with open(self.journal_path, 'wb'):
+            pass
+        self.journal_size = 0
+        self._needs_compaction = False
+        self._remember(steam_path, accounts, revisions)
+        return self.snapshot_size
+
+
+class ConfigWriter(QThread):
+    """Saves the vault through a store on a worker thread, merging bursts of saves into one write.
+
+    `submit` only copies the account list, so it is cheap to call from the UI
+    thread after every edit. Accounts are serialized on the worker; an edit made
+    while a write is in progress is followed by another `submit`, so the file
+    always converges on the latest state.
+    """
+    save_finished = pyqtSignal(float, int)  # latency in ms, bytes written
+    save_failed = pyqtSignal(str)
+
+    def __init__(self, store, delay=0.3, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.delay = delay
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._last_submit = 0.0
+        self._submitted = 0
+        self._written = 0
+        self._flush_requested = False
+        self._running = True
+
+        self.save_count = 0
+        self.bytes_written = 0
+        self.last_latency = 0.0
+
+    def submit(self, steam_path, accounts):
+        """Queue a snapshot of the vault for writing"""
+        snapshot = (steam_path, list(accounts))
+        with self._condition:
+            self._pending = snapshot
+            self._submitted += 1
+            self._last_submit = time.monotonic()
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until every submitted snapshot is on disk"""
+        if not self.isRunning():
+            self._write_pending()
+            return True
+
+        with self._condition:
+            target = self._submitted
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._written >= target, timeout)
+
+    def stop(self):
+        """Write any pending snapshot and stop the worker"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.wait()
+        self._write_pending()
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or not self._running)
+                if self._pending is None:
+                    return
+
+                # Wait for the burst of edits to settle before writing
+                while self._running and not self._flush_requested:
+                    remaining = self._last_submit + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._condition:
+            snapshot, generation = self._pending, self._submitted
+            self._pending = None
+            self._flush_requested = False
+
+        if snapshot is not None:
+            steam_path, accounts = snapshot
+            start = time.perf_counter()
+            try:
+                size = self.store.save(steam_path, accounts)
+            except Exception as e:
+                self.save_failed.emit(str(e))
+            else:
+                self.last_latency = (time.perf_counter() - start) * 1000
+                self.save_count += 1
+                self.bytes_written += size
+                self.save_finished.emit(self.last_latency, size)
+
+        with self._condition:
+            self._written = max(self._written, generation)
+            self._condition.notify_all()
@@ -1,57 +1,179 @@
-
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
+from PyQt5.QtCore import *
+
+# The dark theme of the whole application. It is applied once to the
+# QApplication, so Qt parses it once and every widget is polished from the
+# same rules, instead of each widget parsing its own copy when it is created.
+# Rules are scoped to the app's own windows, so message boxes without a
+# parent keep the default look.
+THEME = """
+    QMainWindow, AddAccountDialog, GameDialog {
+        background-color: #1a2634;
+    }
+    QMainWindow QLabel, AddAccountDialog QLabel, GameDialog QLabel {
+        color: #ecf0f1;
+    }
+    QLabel[validation="true"] {
+        color: red;
+    }
+    QMainWindow QStatusBar {
+        color: white;
+    }
+    QMainWindow QLineEdit, AddAccountDialog QLineEdit, GameDialog QLineEdit {
+        background-color: #2c3e50;
+        color: #ecf0f1;
+        border: 1px solid #34495e;
+        border-radius: 4px;
+        padding: 5px;
+    }
+    QMainWindow QComboBox, GameDialog QComboBox {
+        background-color: #2c3e50;
+        color: #ecf0f1;
+        border: 1px solid #34495e;
+        border-radius: 4px;
+        padding: 5px;
+    }
+    QMainWindow QComboBox::drop-down {
+        subcontrol-origin: padding;
+        subcontrol-position: top right;
+        width: 20px;
+        border-left-width: 1px;
+        border-left-color: #34495e;
+        border-left-style: solid;
+    }
+    QMainWindow QComboBox QAbstractItemView, GameDialog QComboBox QAbstractItemView {
+        background-color: #2c3e50;
+        color: #ecf0f1;
+        selection-background-color: #3498db;
+        selection-color: white;
+    }
+    AddAccountDialog QCheckBox, GameDialog QCheckBox, QCheckBox#startupCheckbox {
+        color: #ecf0f1;
+    }
+    QCheckBox#startupCheckbox {
+        spacing: 10px;
+    }
+    QCheckBox#startupCheckbox::indicator {
+        width: 18px;
+        height: 18px;
+        border: 1px solid #34495e;
+        border-radius: 4px;
+        background-color: #2c3e50;
+    }
+    QCheckBox#startupCheckbox::indicator:checked {
+        background-color: #3498db;
+        image: url(:/checkbox-checked.png);
+    }
+    ModernStyledButton {
+        background-color: #3498db;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+        /* Room for the shadow ModernStyledButton paints around itself */
+        margin: 0px 2px 4px 2px;
+    }
+    ModernStyledButton:hover {
+        background-color: #2980b9;
+    }
+    ModernStyledButton:pressed {
+        background-color: #21618C;
+    }
+    ModernStyledListWidget, ModernStyledListView {
+        background-color: #2c3e50;
+        color: #ecf0f1;
+        border: 1px solid #34495e;
+        border-radius: 4px;
+        padding: 5px;
+    }
+    ModernStyledListWidget::item, ModernStyledListView::item {
+        background-color: #34495e;
+        border-radius: 4px;
+        margin: 2px;
+        padding: 8px;
+    }
+    ModernStyledListWidget::item:selected, ModernStyledListView::item:selected {
+        background-color: #3498db;
+        color: white;
+    }
+    ModernStyledListWidget::item:hover, ModernStyledListView::item:hover {
+        background-color: #2980b9;
+    }
+"""
+
+
+def apply_theme(app):
+    """Style the whole application; call once, before creating any window"""
+    app.setStyleSheet(THEME)
+
 
 class ModernStyledButton(QPushButton):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-            QPushButton:pressed {
-                background-color: #21618C;
-            }
-        """)
-        
-        # Add shadow effect
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(15)
-        shadow.setColor(QColor(0, 0, 0, 80))
-        shadow.setOffset(0, 2)
-        self.setGraphicsEffect(shadow)
+    """Themed push button with a soft drop shadow.
+
+    The shadow is a pixmap drawn into the button's margin and cached per
+    size, rather than a QGraphicsDropShadowEffect, which renders the button
+    offscreen and blurs it again on every repaint.
+    """
+
+    SHADOW_COLOR = QColor(0, 0, 0, 80)
+    SHADOW_OFFSET = 2
+    SHADOW_SPREAD = 2
+    # Matches the margin in THEME: left, top, right, bottom
+    MARGINS = (2, 0, 2, 4)
+    # Sizes kept; resizing a window passes through many
+    SHADOW_CACHE = 64
+
+    _shadows = {}
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.shadow(self.size(), self.devicePixelRatioF()))
+        painter.end()
+        super().paintEvent(event)
+
+    @classmethod
+    def shadow(cls, size, ratio=1.0):
+        """The shadow of a button of the given size, drawn once per size"""
+        key = (size.width(), size.height(), ratio)
+        pixmap = cls._shadows.get(key)
+        if pixmap is None:
+            if len(cls._shadows) >= cls.SHADOW_CACHE:
+                cls._shadows.clear()
+            pixmap = cls._shadows[key] = cls._draw_shadow(size, ratio)
+        return pixmap
+
+    @classmethod
+    def _draw_shadow(cls, size, ratio):
+        pixmap = QPixmap(size * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        left, top, right, bottom = cls.MARGINS
+        box = QRectF(left, top, size.width() - left - right, size.height() - top - bottom)
+        box.translate(0, cls.SHADOW_OFFSET)
+
+        # Rounded rects shrinking towards the button, each adding a little
+        # opacity, fade the shadow out towards its edge
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        color = QColor(cls.SHADOW_COLOR)
+        color.setAlpha(cls.SHADOW_COLOR.alpha() // (cls.SHADOW_SPREAD + 1))
+        painter.setBrush(color)
+        for step in range(cls.SHADOW_SPREAD, -1, -1):
+            painter.drawRoundedRect(box.adjusted(-step, -step, step, step), 4 + step, 4 + step)
+        painter.end()
+        return pixmap
 
 
 class ModernStyledListWidget(QListWidget):
+    """List widget styled by THEME"""
+
+
+class ModernStyledListView(QListView):
+    """Styled like ModernStyledListWidget, for lists backed by a model"""
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.setStyleSheet("""
-            QListWidget {
-                background-color: #2c3e50;
-                color: #ecf0f1;
-                border: 1px solid #34495e;
-                border-radius: 4px;
-                padding: 5px;
-            }
-            QListWidget::item {
-                background-color: #34495e;
-                border-radius: 4px;
-                margin: 2px;
-                padding: 8px;
-            }
-            QListWidget::item:selected {
-                background-color: #3498db;
-                color: white;
-            }
-            QListWidget::item:hover {
-                background-color: #2980b9;
-            }
-        """)
+        # Rows all have the same height, so only the visible ones are measured
+        self.setUniformItemSizes(True)